@@ -7,10 +7,10 @@
 # THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base  
 from sqlalchemy.orm import sessionmaker
-from app.models.models import Base
+from app.models.models import Base, Product, SEARCH_BLOB_EXPRESSION
 import os
 
 # Database URL - using SQLite for simplicity, can be changed to PostgreSQL/MySQL
@@ -26,6 +26,22 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 def create_tables():
     """Create all tables in the database"""
     Base.metadata.create_all(bind=engine)
+    _add_search_blob_column()
+
+def _add_search_blob_column():
+    """Add products.search_blob and its index to a products table created before the column existed"""
+    columns = {column["name"] for column in inspect(engine).get_columns("products")}
+    if "search_blob" in columns:
+        return
+    
+    storage = "VIRTUAL" if engine.dialect.name == "sqlite" else "STORED"
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"ALTER TABLE products ADD COLUMN search_blob TEXT GENERATED ALWAYS AS ({SEARCH_BLOB_EXPRESSION}) {storage}"
+        ))
+        for index in Product.__table__.indexes:
+            if "search_blob" in index.columns:
+                index.create(bind=conn, checkfirst=True)
 
 def get_db():
     """Get database session"""
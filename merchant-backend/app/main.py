@@ -18,6 +18,7 @@ load_dotenv()
 from fastapi.middleware.cors import CORSMiddleware
 from app.database.database import create_tables
 from app.routes import products, cart, orders, auth
+from app.services.payment_facilitator import close_facilitator_clients
 
 # Configure logging
 logging.basicConfig(
@@ -72,6 +73,11 @@ def startup_event():
     create_tables()
     logger.info("✅ Database tables created/verified")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled Payment Facilitator connections on shutdown"""
+    await close_facilitator_clients()
+
 @app.get("/")
 def read_root():
     """Root endpoint"""
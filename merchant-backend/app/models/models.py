@@ -6,13 +6,16 @@
 #
 # THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, Computed, Index, DDL, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
 Base = declarative_base()
 
+# Generated products.search_blob expression, shared with the startup and script migrations
+SEARCH_BLOB_EXPRESSION = "lower(coalesce(name, '') || ' ' || coalesce(description, '') || ' ' || coalesce(category, ''))"
+
 class Product(Base):
     __tablename__ = "products"
     
@@ -24,10 +27,43 @@ class Product(Base):
     image_url = Column(String(500))
     stock_quantity = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Lowercased name/description/category so text search is a single LIKE per row.
+    # Storage is left to the dialect: VIRTUAL on SQLite (the only kind ALTER TABLE can
+    # add there), STORED on PostgreSQL (the only kind it supports)
+    search_blob = Column(Text, Computed(SEARCH_BLOB_EXPRESSION))
     
     # Relationship with cart items
     cart_items = relationship("CartItem", back_populates="product")
     order_items = relationship("OrderItem", back_populates="product")
+    
+    __table_args__ = (
+        # Trigram index on PostgreSQL; plain index elsewhere
+        Index(
+            "ix_products_search_blob",
+            "search_blob",
+            postgresql_using="gin",
+            postgresql_ops={"search_blob": "gin_trgm_ops"}
+        ),
+    )
+
+# gin_trgm_ops requires the pg_trgm extension
+event.listen(
+    Product.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+# Columns the Product schema returns; routes load only these so search_blob is never fetched
+PRODUCT_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.description,
+    Product.price,
+    Product.category,
+    Product.image_url,
+    Product.stock_quantity,
+    Product.created_at
+)
 
 class Cart(Base):
     __tablename__ = "carts"
@@ -9,7 +9,7 @@
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional
-from app.security.signature_verification import signature_verifier
+from app.security.signature_verification import signature_verifier, RequestData
 import base64
 import json
 
@@ -35,12 +35,12 @@ def verify_signature(verification_request: SignatureVerificationRequest):
     
     try:
         # Prepare request data for signature verification
-        request_data = {
-            "authority": verification_request.authority,
-            "path": verification_request.path,
-            "directory-agent": verification_request.directory_agent or "",
-            "query-param": verification_request.query_param or ""
-        }
+        request_data = RequestData(
+            authority=verification_request.authority,
+            path=verification_request.path,
+            directory_agent=verification_request.directory_agent or "",
+            query_param=verification_request.query_param or ""
+        )
         
         # Verify the signature
         is_trusted, message = signature_verifier.is_trusted_agent(
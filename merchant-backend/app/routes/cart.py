@@ -7,8 +7,11 @@
 # THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, func, cast, Numeric
 from sqlalchemy.orm import Session
 from app.database.database import get_db
+from app.services.payment_facilitator import async_facilitator_client
 from app.models.models import (
     Cart as CartModel, 
     CartItem as CartItemModel, 
@@ -22,9 +25,32 @@ from app.schemas import (
     CartFulfillRequest, CartFulfillResponse, Message
 )
 import uuid
+import hmac
+import hashlib
+import httpx
+from decimal import Decimal, ROUND_HALF_UP
 
 router = APIRouter(prefix="/cart", tags=["cart"])
 
+# x402 checkout pricing
+X402_SHIPPING_COST = Decimal("15.00")  # Standard shipping
+X402_TAX_RATE = Decimal("0.0875")  # 8.75% tax
+CENTS = Decimal("0.01")
+
+def cart_subtotal(db: Session, cart_id: int) -> Decimal:
+    """Sum quantity * price for a cart in the database as an exact decimal"""
+    return db.execute(
+        select(
+            cast(
+                func.coalesce(func.sum(CartItemModel.quantity * ProductModel.price), 0),
+                Numeric(12, 2)
+            )
+        )
+        .select_from(CartItemModel)
+        .join(ProductModel, ProductModel.id == CartItemModel.product_id)
+        .where(CartItemModel.cart_id == cart_id)
+    ).scalar_one()
+
 def generate_order_number():
     """Generate a unique order number"""
     from datetime import datetime
@@ -788,11 +814,10 @@ async def x402_checkout(
             raise HTTPException(status_code=400, detail="Cart is empty")
         
         # Calculate totals
-        subtotal = sum(item.quantity * item.product.price for item in cart.items)
-        shipping_cost = 15.00  # Standard shipping
-        tax_rate = 0.0875  # 8.75% tax
-        tax_amount = subtotal * tax_rate
-        total_amount = subtotal + shipping_cost + tax_amount
+        subtotal = cart_subtotal(db, cart.id)
+        shipping_cost = X402_SHIPPING_COST
+        tax_amount = (subtotal * X402_TAX_RATE).quantize(CENTS, rounding=ROUND_HALF_UP)
+        total_amount = float(subtotal + shipping_cost + tax_amount)
         
         # Prepare items for settlement request
         items = []
@@ -801,7 +826,7 @@ async def x402_checkout(
                 "product_id": cart_item.product_id,
                 "name": cart_item.product.name,
                 "quantity": cart_item.quantity,
-                "price": float(cart_item.product.price)
+                "price": cart_item.product.price
             })
         
         # Prepare settlement request to Payment Facilitator
@@ -812,8 +837,6 @@ async def x402_checkout(
         settlement_data = f"{merchant_id}:{session_id}:{total_amount}"
         merchant_secret = f"merchant_{merchant_id}_secret"
         
-        import hmac
-        import hashlib
         merchant_signature = hmac.new(
             merchant_secret.encode('utf-8'),
             settlement_data.encode('utf-8'),
@@ -832,12 +855,9 @@ async def x402_checkout(
         }
         
         # Call Payment Facilitator to settle payment
-        import requests
-        facilitator_url = "http://localhost:8001"
-        
         try:
-            settlement_response = requests.post(
-                f"{facilitator_url}/x402/settle",
+            settlement_response = await async_facilitator_client.post(
+                "/x402/settle",
                 json=settlement_request,
                 headers={"Content-Type": "application/json"},
                 timeout=30
@@ -853,7 +873,7 @@ async def x402_checkout(
             settlement_data = settlement_response.json()
             receipt = settlement_data["transaction_receipt"]
             
-        except requests.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             raise HTTPException(
                 status_code=503,
                 detail=f"Payment Facilitator unavailable: {str(e)}"
@@ -877,18 +897,17 @@ async def x402_checkout(
         db.commit()
         db.refresh(order)
         
-        # Create order items from cart
-        for cart_item in cart.items:
+        # Create order items from the settled items (cart.items is expired after commit)
+        for item in items:
             order_item = OrderItemModel(
                 order_id=order.id,
-                product_id=cart_item.product_id,
-                quantity=cart_item.quantity,
-                price=cart_item.product.price
+                product_id=item["product_id"],
+                quantity=item["quantity"],
+                price=item["price"]
             )
             db.add(order_item)
         
         # Clear cart after successful checkout
-        from app.models.models import CartItem as CartItemModel
         db.query(CartItemModel).filter(CartItemModel.cart_id == cart.id).delete()
         
         db.commit()
@@ -897,7 +916,7 @@ async def x402_checkout(
         tracking_number = f"TRK{uuid.uuid4().hex[:10].upper()}"
         
         # Return comprehensive order details to agent
-        return {
+        payload = {
             "status": "success",
             "message": "x402 checkout completed successfully",
             "order": {
@@ -905,7 +924,7 @@ async def x402_checkout(
                 "order_number": order.order_number,
                 "customer_name": order.customer_name,
                 "customer_email": order.customer_email,
-                "total_amount": float(order.total_amount),
+                "total_amount": order.total_amount,
                 "subtotal": float(subtotal),
                 "tax_amount": float(tax_amount),
                 "shipping_cost": float(shipping_cost),
@@ -915,13 +934,13 @@ async def x402_checkout(
                 "created_at": order.created_at.isoformat(),
                 "items": [
                     {
-                        "product_id": item.product_id,
-                        "product_name": item.product.name,
-                        "quantity": item.quantity,
-                        "unit_price": float(item.price),
-                        "total_price": float(item.quantity * item.price)
+                        "product_id": item["product_id"],
+                        "product_name": item["name"],
+                        "quantity": item["quantity"],
+                        "unit_price": item["price"],
+                        "total_price": item["quantity"] * item["price"]
                     }
-                    for item in order.items
+                    for item in items
                 ]
             },
             "payment": {
@@ -945,6 +964,7 @@ async def x402_checkout(
                 "status": "processing"
             }
         }
+        return ORJSONResponse(content=payload)
         
     except HTTPException:
         raise
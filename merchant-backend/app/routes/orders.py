@@ -7,11 +7,12 @@
 # THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only, selectinload
 from app.database.database import get_db
 from app.models.models import (
     Order as OrderModel, 
-    OrderItem as OrderItemModel
+    OrderItem as OrderItemModel,
+    PRODUCT_COLUMNS
 )
 from app.schemas import Order, OrderList, Message
 import uuid
@@ -36,7 +37,20 @@ def get_orders(
     db: Session = Depends(get_db)
 ):
     """Get orders with optional filtering"""
-    query = db.query(OrderModel)
+    # Load only the columns the Order schema returns; items are loaded in one extra query
+    query = db.query(OrderModel).options(
+        load_only(
+            OrderModel.id,
+            OrderModel.order_number,
+            OrderModel.customer_email,
+            OrderModel.customer_name,
+            OrderModel.total_amount,
+            OrderModel.status,
+            OrderModel.created_at,
+            OrderModel.updated_at
+        ),
+        selectinload(OrderModel.items).selectinload(OrderItemModel.product).load_only(*PRODUCT_COLUMNS)
+    )
     
     if customer_email:
         query = query.filter(OrderModel.customer_email == customer_email)
@@ -8,12 +8,13 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
 from typing import Optional
-import requests
+import httpx
 import logging
 from app.database.database import get_db
-from app.models.models import Product as ProductModel
+from app.services.payment_facilitator import facilitator_client, PAYMENT_FACILITATOR_URL
+from app.models.models import Product as ProductModel, PRODUCT_COLUMNS
 from app.schemas import Product, ProductList, ProductSearch, ProductCreate
 from sqlalchemy import and_, or_
 
@@ -53,8 +54,8 @@ def search_products(
     if max_price is not None:
         filters.append(ProductModel.price <= max_price)
     
-    # Apply filters
-    query_obj = db.query(ProductModel)
+    # Apply filters, loading only the columns the Product schema returns
+    query_obj = db.query(ProductModel).options(load_only(*PRODUCT_COLUMNS))
     if filters:
         query_obj = query_obj.filter(and_(*filters))
     
@@ -96,7 +97,7 @@ def premium_search_products(
                 "amount": 0.50,  # $0.50 for premium search
                 "currency": "USD",
                 "payment_type": "x402_delegation",
-                "payment_facilitator_url": "http://localhost:8001",
+                "payment_facilitator_url": PAYMENT_FACILITATOR_URL,
                 "service_description": "Premium Product Search with Enhanced Features",
                 "features": [
                     "Advanced search algorithms",
@@ -113,8 +114,8 @@ def premium_search_products(
     
     # Verify delegation token with Payment Facilitator
     try:
-        pf_response = requests.post(
-            "http://localhost:8001/verify-delegation",
+        pf_response = facilitator_client.post(
+            "/verify-delegation",
             json={
                 "delegation_token": delegate_token,
                 "amount": 0.50,
@@ -140,7 +141,7 @@ def premium_search_products(
             
         logger.info(f"✅ Delegation token verified for premium search: {verification_result}")
         
-    except requests.RequestException as e:
+    except (httpx.HTTPError, ValueError) as e:
         logger.error(f"Failed to verify delegation token: {e}")
         raise HTTPException(
             status_code=502, 
@@ -154,14 +155,8 @@ def premium_search_products(
     filters = []
     
     if query:
-        # Enhanced search with stemming and fuzzy matching (premium feature)
-        filters.append(
-            or_(
-                ProductModel.name.ilike(f"%{query}%"),
-                ProductModel.description.ilike(f"%{query}%"),
-                ProductModel.category.ilike(f"%{query}%")  # Also search in category
-            )
-        )
+        # Enhanced search across name, description and category (premium feature)
+        filters.append(ProductModel.search_blob.ilike(f"%{query.lower()}%"))
     
     if category:
         filters.append(ProductModel.category.ilike(f"%{category}%"))
@@ -172,8 +167,9 @@ def premium_search_products(
     if max_price is not None:
         filters.append(ProductModel.price <= max_price)
     
-    # Apply filters with premium sorting
-    query_obj = db.query(ProductModel)
+    # Apply filters with premium sorting; this response has no response_model, so only
+    # the public product columns are loaded and serialized
+    query_obj = db.query(ProductModel).options(load_only(*PRODUCT_COLUMNS))
     if filters:
         query_obj = query_obj.filter(and_(*filters))
     
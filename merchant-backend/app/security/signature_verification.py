@@ -6,15 +6,20 @@
 #
 # THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-import re
 import time
+import functools
+import logging
 import json
-from typing import Dict, Optional, Tuple
+from typing import Dict, NamedTuple, Optional, Tuple
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.asymmetric import rsa, padding, utils
 from cryptography.exceptions import InvalidSignature
 import base64
+import binascii
 import hashlib
+import hmac
+
+logger = logging.getLogger(__name__)
 
 publicKey = """-----BEGIN PUBLIC KEY-----
 MIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKCAQEAysHJFJ9uoVvU1sH2x3TV
@@ -26,6 +31,130 @@ e1CoL/9a/DWilJwd481QkurvZqGaKegX5DlI+jLNvfi8TWMS3jCjknyOLg54KU86
 LQIDAQAB
 -----END PUBLIC KEY-----"""
 
+# Parsed once and shared by every trusted agent that uses this key
+_PUBLIC_KEY = serialization.load_pem_public_key(publicKey.encode("utf-8"))
+
+_PSS_PADDING = padding.PSS(
+    mgf=padding.MGF1(hashes.SHA256()),
+    salt_length=padding.PSS.MAX_LENGTH
+)
+# Signatures are checked against a SHA-256 digest of the signature string, not the string itself
+_PREHASHED_SHA256 = utils.Prehashed(hashes.SHA256())
+
+class RequestData(NamedTuple):
+    """Request components that can be covered by a signature."""
+    authority: str = ""
+    path: str = ""
+    directory_agent: str = ""
+    query_param: str = ""
+
+# Covered component -> RequestData attribute used to fill it in the signature string
+_PARAM_MAP = {
+    "@authority": "authority",
+    "@path": "path",
+    "directory-agent": "directory_agent",
+    "query-param": "query_param"
+}
+
+@functools.lru_cache(maxsize=64)
+def _signature_template(params: Tuple[str, ...]) -> Tuple:
+    """Precompute the static parts of the signature string for a covered-component list.
+    
+    Returns a SHA-256 state already fed the leading label, the RequestData
+    attributes to fill in order, and the static bytes that follow each value.
+    The last separator leads into the nonce line.
+    """
+    labels = [param for param in params if param in _PARAM_MAP]
+    
+    static = [b'"' + label.encode() + b'": "' for label in labels]
+    static.append(b'"nonce": "')
+    
+    prefix = hashlib.sha256(static[0])
+    separators = tuple(b'"\n' + part for part in static[1:])
+    return prefix, tuple(_PARAM_MAP[label] for label in labels), separators
+
+def _unquote(value: Optional[str]) -> Optional[str]:
+    """Return the contents of a non-empty double-quoted value, or None."""
+    if value is None or len(value) < 3 or value[0] != '"' or value[-1] != '"':
+        return None
+    inner = value[1:-1]
+    return None if '"' in inner else inner
+
+class ParsedSig(NamedTuple):
+    """Components extracted from the Signature-Agent, Signature-Input and Signature headers."""
+    agent_url: str
+    signature_params: Tuple[str, ...]
+    nonce: str
+    created: int
+    expires: int
+    keyid: str
+    tag: str
+    signature_bytes: bytes
+
+@functools.lru_cache(maxsize=1024)
+def _parse_headers_cached(signature_agent: str, signature_input: str, signature: str) -> Optional[ParsedSig]:
+    """Parse the signature headers; identical header triples reuse the cached result."""
+    try:
+        # Parse Signature-Agent
+        agent_url = signature_agent.strip('"')
+        
+        # Parse Signature-Input: sig1=("<params>"); nonce="..."; created=...; expires=...; keyid="..."; tag="..."
+        head, sep, rest = signature_input.strip().partition(");")
+        if not sep or not head.startswith("sig1=("):
+            return None
+        
+        signature_params = _unquote(head[len("sig1=("):])
+        
+        fields = {}
+        for item in rest.split(";"):
+            key, _, value = item.strip().partition("=")
+            fields[key] = value
+        
+        nonce = _unquote(fields.get("nonce"))
+        keyid = _unquote(fields.get("keyid"))
+        tag = _unquote(fields.get("tag"))
+        created = fields.get("created", "")
+        expires = fields.get("expires", "")
+        
+        if None in (signature_params, nonce, keyid, tag):
+            return None
+        signature_params = tuple(signature_params.split())
+        if not signature_params:
+            return None
+        if not (created.isdigit() and expires.isdigit()):
+            return None
+        created, expires = int(created), int(expires)
+        if expires < created:
+            return None
+        
+        # Parse Signature: sig1=:<base64>:
+        signature = signature.strip()
+        if not signature.startswith("sig1=:"):
+            return None
+        
+        signature_value, sep, _ = signature[len("sig1=:"):].partition(":")
+        if not sep or not signature_value:
+            return None
+        
+        try:
+            signature_bytes = base64.b64decode(signature_value, validate=True)
+        except binascii.Error:
+            return None
+        
+        return ParsedSig(
+            agent_url=agent_url,
+            signature_params=signature_params,
+            nonce=nonce,
+            created=created,
+            expires=expires,
+            keyid=keyid,
+            tag=tag,
+            signature_bytes=signature_bytes
+        )
+    except Exception as e:
+        logger.debug("Error parsing signature headers: %s", e)
+        return None
+
 class SignatureVerifier:
     def __init__(self):
         # In production, these would be loaded from secure storage/config
@@ -39,127 +168,94 @@ class SignatureVerifier:
                 "name": "Sample Payment Directory"
             }
         }
+        self._agent_table: Dict[str, Tuple] = {
+            url: (info["public_key"], info["name"]) for url, info in self.trusted_agents.items()
+        }
+        # SHA-256 of each trusted URL, compared in constant time on lookup
+        self._trusted_hashes = [
+            (hashlib.sha256(url.encode("utf-8")).digest(), entry) for url, entry in self._agent_table.items()
+        ]
     
     def _load_public_key(self, agent_name: str):
         """Load public key for the agent. In production, load from secure storage."""
         
         if agent_name == "example":
-            return serialization.load_pem_public_key(publicKey.encode("utf-8"))
+            return _PUBLIC_KEY
         elif agent_name == "sample":
             # Replace with actual sample public key in production
-            return serialization.load_pem_public_key(publicKey.encode("utf-8"))
+            return _PUBLIC_KEY
         else:
             raise ValueError(f"Unknown agent name: {agent_name}")
-
     
-    def parse_signature_headers(self, signature_agent: str, signature_input: str, signature: str) -> Optional[Dict]:
+    def _lookup_agent(self, agent_url: str) -> Optional[Tuple]:
+        """Return the (public_key, name) entry for an agent URL, checking every candidate in constant time."""
+        digest = hashlib.sha256(agent_url.encode("utf-8")).digest()
+        match = None
+        for candidate, entry in self._trusted_hashes:
+            if hmac.compare_digest(candidate, digest):
+                match = entry
+        return match
+    
+    def parse_signature_headers(self, signature_agent: str, signature_input: str, signature: str) -> Optional[ParsedSig]:
         """Parse the signature headers and extract components."""
-        try:
-            # Parse Signature-Agent
-            agent_url = signature_agent.strip('"')
-            
-            # Parse Signature-Input
-            signature_input_pattern = r'sig1=\("([^"]+)"\);\s*nonce="([^"]+)";\s*created=(\d+);\s*expires=(\d+);\s*keyid="([^"]+)";\s*tag="([^"]+)"'
-            match = re.match(signature_input_pattern, signature_input.strip())
-            
-            if not match:
-                return None
-            
-            signature_params, nonce, created, expires, keyid, tag = match.groups()
-            
-            # Parse Signature
-            signature_pattern = r'sig1=:([^:]+):'
-            sig_match = re.match(signature_pattern, signature.strip())
-            
-            if not sig_match:
-                return None
-            
-            signature_value = sig_match.group(1)
-            
-            return {
-                "agent_url": agent_url,
-                "signature_params": signature_params.split(" "),
-                "nonce": nonce,
-                "created": int(created),
-                "expires": int(expires),
-                "keyid": keyid,
-                "tag": tag,
-                "signature": signature_value
-            }
-        except Exception as e:
-            print(f"Error parsing signature headers: {e}")
-            return None
+        return _parse_headers_cached(signature_agent, signature_input, signature)
     
-    def verify_signature(self, parsed_data: Dict, request_data: Dict) -> Tuple[bool, str]:
+    def verify_signature(self, parsed_data: ParsedSig, request_data: RequestData) -> Tuple[bool, str]:
         """Verify the signature against the request data."""
         try:
-            agent_url = parsed_data["agent_url"]
+            agent_url = parsed_data.agent_url
             
             # Check if agent is trusted
-            if agent_url not in self.trusted_agents:
+            entry = self._lookup_agent(agent_url)
+            if entry is None:
                 return False, f"Unknown agent: {agent_url}"
+            public_key, agent_name = entry
             
             # Check timestamp validity
             current_time = int(time.time())
-            if current_time < parsed_data["created"]:
+            if current_time < parsed_data.created:
                 return False, "Signature created in the future"
             
-            if current_time > parsed_data["expires"]:
+            if current_time > parsed_data.expires:
                 return False, "Signature expired"
             
-            # Build signature string
-            signature_string = self._build_signature_string(
-                parsed_data["signature_params"],
+            # Hash signature string
+            signature_digest = self._signature_digest(
+                parsed_data.signature_params,
                 request_data,
-                parsed_data["nonce"],
-                parsed_data["created"],
-                parsed_data["expires"]
+                parsed_data.nonce,
+                parsed_data.created,
+                parsed_data.expires
             )
             
             # Verify signature
-            public_key = self.trusted_agents[agent_url]["public_key"]
-            signature_bytes = base64.b64decode(parsed_data["signature"])
-            
             try:
-                public_key.verify(
-                    signature_bytes,
-                    signature_string.encode('utf-8'),
-                    padding.PSS(
-                        mgf=padding.MGF1(hashes.SHA256()),
-                        salt_length=padding.PSS.MAX_LENGTH
-                    ),
-                    hashes.SHA256()
-                )
-                return True, f"Verified agent: {self.trusted_agents[agent_url]['name']}"
+                public_key.verify(parsed_data.signature_bytes, signature_digest, _PSS_PADDING, _PREHASHED_SHA256)
+                return True, f"Verified agent: {agent_name}"
             except InvalidSignature:
                 return False, "Invalid signature"
                 
         except Exception as e:
             return False, f"Verification error: {str(e)}"
     
-    def _build_signature_string(self, params: list, request_data: Dict, nonce: str, created: int, expires: int) -> str:
-        """Build the signature string from the parameters."""
-        signature_parts = []
+    def _signature_digest(self, params: Tuple[str, ...], request_data: RequestData, nonce: str, created: int, expires: int) -> bytes:
+        """Hash the signature string for the parameters without materializing it."""
+        prefix, attrs, separators = _signature_template(params)
+        digest = prefix.copy()
         
-        for param in params:
-            if param == "@authority":
-                signature_parts.append(f'"@authority": "{request_data.get("authority", "")}"')
-            elif param == "@path":
-                signature_parts.append(f'"@path": "{request_data.get("path", "")}"')
-            elif param == "directory-agent":
-                signature_parts.append(f'"directory-agent": "{request_data.get("directory-agent", "")}"')
-            elif param == "query-param":
-                signature_parts.append(f'"query-param": "{request_data.get("query-param", "")}"')
+        for attr, separator in zip(attrs, separators):
+            digest.update(getattr(request_data, attr).encode())
+            digest.update(separator)
         
-        signature_parts.extend([
-            f'"nonce": "{nonce}"',
-            f'"created": {created}',
-            f'"expires": {expires}'
-        ])
+        digest.update(nonce.encode())
+        digest.update(b'"\n"created": ')
+        digest.update(str(created).encode())
+        digest.update(b'\n"expires": ')
+        digest.update(str(expires).encode())
         
-        return "\n".join(signature_parts)
+        return digest.digest()
     
-    def is_trusted_agent(self, signature_agent: str, signature_input: str, signature: str, request_data: Dict) -> Tuple[bool, str]:
+    def is_trusted_agent(self, signature_agent: str, signature_input: str, signature: str, request_data: RequestData) -> Tuple[bool, str]:
         """Main method to verify if the request is from a trusted agent."""
         # Parse headers
         parsed_data = self.parse_signature_headers(signature_agent, signature_input, signature)
@@ -0,0 +1,32 @@
+# © 2025 Visa.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import httpx
+
+# Payment Facilitator base URL
+PAYMENT_FACILITATOR_URL = os.getenv("PAYMENT_FACILITATOR_URL", "http://localhost:8001")
+
+_limits = httpx.Limits(max_keepalive_connections=32)
+
+# Shared clients keep connections to the facilitator alive between requests, so the
+# host is only resolved when the pool opens a new connection.
+# HTTP/2 is negotiated when the facilitator is served over TLS.
+facilitator_client = httpx.Client(
+    base_url=PAYMENT_FACILITATOR_URL,
+    transport=httpx.HTTPTransport(retries=0, http2=True, limits=_limits)
+)
+async_facilitator_client = httpx.AsyncClient(
+    base_url=PAYMENT_FACILITATOR_URL,
+    transport=httpx.AsyncHTTPTransport(retries=0, http2=True, limits=_limits)
+)
+
+async def close_facilitator_clients():
+    """Close the shared Payment Facilitator clients"""
+    facilitator_client.close()
+    await async_facilitator_client.aclose()
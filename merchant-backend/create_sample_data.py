@@ -9,9 +9,18 @@
 from app.database.database import SessionLocal, create_tables
 from app.models.models import Product
 
+_TABLES_READY = False
+
+def ensure_tables():
+    """Create the database tables once per process"""
+    global _TABLES_READY
+    if not _TABLES_READY:
+        create_tables()
+        _TABLES_READY = True
+
 def create_sample_products():
     """Create sample products for testing"""
-    db = SessionLocal()
+    ensure_tables()
     
     sample_products = [
         {
@@ -176,22 +185,21 @@ def create_sample_products():
         }
     ]
     
-    # Check if products already exist
-    existing_products = db.query(Product).count()
-    if existing_products > 0:
-        print(f"Database already has {existing_products} products. Skipping sample data creation.")
-        db.close()
-        return
-    
-    # Create products
-    for product_data in sample_products:
-        product = Product(**product_data)
-        db.add(product)
+    with SessionLocal() as db:
+        # Check if products already exist
+        if db.query(Product.id).limit(1).first() is not None:
+            print("Database already has products. Skipping sample data creation.")
+            return
+        
+        # Create products in a single batched INSERT
+        try:
+            db.bulk_insert_mappings(Product, sample_products)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
     
-    db.commit()
     print(f"Created {len(sample_products)} sample products")
-    db.close()
 
 if __name__ == "__main__":
-    create_tables()
     create_sample_products()
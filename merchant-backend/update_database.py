@@ -8,18 +8,19 @@
 # THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 """
-Script to update the database schema with new columns for the orders table
+Script to update the database schema with new columns for the orders and products tables
 """
 
 import sqlite3
 import os
 from pathlib import Path
+from app.models.models import SEARCH_BLOB_EXPRESSION
 
 # Database file path
 DB_PATH = Path(__file__).parent / "merchant.db"
 
 def update_database():
-    """Add new columns to the orders table"""
+    """Add new columns to the orders and products tables"""
     
     if not DB_PATH.exists():
         print("Database file not found. Please run the backend server first to create the database.")
@@ -29,6 +30,10 @@ def update_database():
     cursor = conn.cursor()
     
     try:
+        # WAL + NORMAL sync lets the migration commit with a single fsync
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        
         # Check if the new columns already exist
         cursor.execute("PRAGMA table_info(orders)")
         columns = [column[1] for column in cursor.fetchall()]
@@ -42,14 +47,29 @@ def update_database():
             ('payment_status', 'VARCHAR(20) DEFAULT "pending"')
         ]
         
+        statements = []
         for column_name, column_type in new_columns:
             if column_name not in columns:
                 print(f"Adding column: {column_name}")
-                cursor.execute(f"ALTER TABLE orders ADD COLUMN {column_name} {column_type}")
+                statements.append(f"ALTER TABLE orders ADD COLUMN {column_name} {column_type};")
             else:
                 print(f"Column {column_name} already exists")
         
-        conn.commit()
+        # Products search column (SQLite can only add generated columns as VIRTUAL)
+        cursor.execute("PRAGMA table_xinfo(products)")
+        product_columns = [column[1] for column in cursor.fetchall()]
+        
+        if 'search_blob' not in product_columns:
+            print("Adding column: search_blob")
+            statements.append(
+                f"ALTER TABLE products ADD COLUMN search_blob TEXT GENERATED ALWAYS AS ({SEARCH_BLOB_EXPRESSION}) VIRTUAL;"
+            )
+        else:
+            print("Column search_blob already exists")
+        statements.append("CREATE INDEX IF NOT EXISTS ix_products_search_blob ON products (search_blob);")
+        
+        # Apply every change in one transaction
+        cursor.executescript("BEGIN IMMEDIATE;" + "".join(statements) + "COMMIT;")
         print("Database schema updated successfully!")
         
     except sqlite3.Error as e:
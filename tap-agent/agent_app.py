@@ -19,13 +19,547 @@ import time
 import webbrowser
 import requests
 import threading
+import functools
+import queue
+import atexit
+import concurrent.futures
+from dataclasses import dataclass
+from typing import Optional
+import logging
 import datetime
 import re
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlparse
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.backends import default_backend
 
+logger = logging.getLogger(__name__)
+
+def _log_level_from_env() -> int:
+    """TAP_LOG_LEVEL as a logging level; unset, empty or unknown values fall back to INFO"""
+    level = getattr(logging, os.getenv('TAP_LOG_LEVEL', '').strip().upper(), None)
+    return level if isinstance(level, int) else logging.INFO
+
+# Agent diagnostics (per-field fills, extraction fallbacks, page dumps) log at DEBUG
+logger.setLevel(_log_level_from_env())
+
+# Currency amounts such as "$19.99" or "19,99 €" in scraped page text
+_PRICE_RE = re.compile(r'[\$€£¥]\s*\d+(?:[.,]\d{2})?|\d+(?:[.,]\d{2})?\s*[\$€£¥]')
+
+# In-page selector lookups: each runs in a single page.evaluate instead of one
+# CDP round-trip per selector. Playwright's `tag:has-text("...")` form is
+# resolved as a case-insensitive innerText match; other selectors are plain CSS.
+# Within one call each tag is collected once and each element's text read once,
+# so a run of has-text selectors shares a single DOM walk.
+_JS_QUERY = """
+    const byTag = new Map();
+    const lowerText = new Map();
+    const textOf = (el) => {
+        if (!lowerText.has(el)) lowerText.set(el, (el.innerText || '').toLowerCase());
+        return lowerText.get(el);
+    };
+    const query = (selector) => {
+        const match = selector.match(/^(.*):has-text\\("(.*)"\\)$/);
+        if (match) {
+            const tag = match[1] || '*';
+            const needle = match[2].toLowerCase();
+            if (!byTag.has(tag)) byTag.set(tag, Array.from(document.querySelectorAll(tag)));
+            return byTag.get(tag).find(el => textOf(el).includes(needle)) || null;
+        }
+        try { return document.querySelector(selector); } catch (e) { return null; }
+    };
+"""
+
+# ([selectors, pattern]) -> trimmed text of the first selector match whose text matches pattern
+_FIRST_MATCHING_TEXT_JS = "([selectors, pattern]) => {" + _JS_QUERY + """
+    const re = new RegExp(pattern);
+    for (const selector of selectors) {
+        const el = query(selector);
+        const text = el ? (el.innerText || el.textContent || '').trim() : '';
+        if (text && re.test(text)) return text;
+    }
+    return null;
+}"""
+
+# (selectors) -> first selector match that is rendered on the page, as an element handle
+_FIRST_VISIBLE_JS = "(selectors) => {" + _JS_QUERY + """
+    for (const selector of selectors) {
+        const el = query(selector);
+        if (el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length)) return el;
+    }
+    return null;
+}"""
+
+# ([[field, selector, value], ...]) -> fields whose value reads back as written. Values go
+# through the native value setter plus input/change events so React-controlled inputs see them.
+_FILL_FIELDS_JS = "(entries) => {" + _JS_QUERY + """
+    const filled = [];
+    for (const [field, selector, value] of entries) {
+        const el = query(selector);
+        if (!el) continue;
+        const proto = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+        Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, value);
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        if (el.value === value) filled.push(field);
+    }
+    return filled;
+}"""
+
+# (selectors) -> the selectors that match at least one element, in the given order
+_PRESENT_SELECTORS_JS = "(selectors) => {" + _JS_QUERY + """
+    return selectors.filter(selector => query(selector) !== null);
+}"""
+
+# ([selector, limit, keywords]) -> {index, text} of the first element among the first
+# `limit` matches (0 = all) whose text or value contains a keyword, or null
+_FIRST_BUTTON_WITH_TEXT_JS = """([selector, limit, keywords]) => {
+    const buttons = Array.from(document.querySelectorAll(selector)).slice(0, limit || undefined);
+    for (let index = 0; index < buttons.length; index++) {
+        const b = buttons[index];
+        const text = (b.innerText || '').toLowerCase();
+        const value = (b.getAttribute('value') || '').toLowerCase();
+        if (keywords.some(k => text.includes(k) || value.includes(k))) return {index, text: text || value};
+    }
+    return null;
+}"""
+
+# ({field: selectors}) -> {field: {selector, tag, type}} naming the first selector per field
+# whose match is visible and enabled; fields with no usable match are left out
+_RESOLVE_FIELDS_JS = "(fields) => {" + _JS_QUERY + """
+    const out = {};
+    for (const [field, selectors] of Object.entries(fields)) {
+        for (const selector of selectors) {
+            const el = query(selector);
+            if (el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length) && !el.disabled) {
+                out[field] = {selector, tag: el.tagName.toLowerCase(), type: (el.getAttribute('type') || '').toLowerCase()};
+                break;
+            }
+        }
+    }
+    return out;
+}"""
+
+# ([urlParts, phrases]) -> true once the URL contains a success path or the rendered text
+# contains a confirmation phrase (both compared lowercase)
+_SUCCESS_PAGE_JS = """([urlParts, phrases]) => {
+    const url = location.href.toLowerCase();
+    if (urlParts.some(part => url.includes(part))) return true;
+    const text = document.body ? document.body.innerText.toLowerCase() : '';
+    return phrases.some(phrase => text.includes(phrase));
+}"""
+
+# (selectors) -> {selector: trimmed innerText} for each selector whose first match is rendered
+_VISIBLE_TEXTS_JS = "(selectors) => {" + _JS_QUERY + """
+    const out = {};
+    for (const selector of selectors) {
+        const el = query(selector);
+        if (el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length)) {
+            out[selector] = (el.innerText || '').trim();
+        }
+    }
+    return out;
+}"""
+
+# (pattern) -> up to 5 currency amounts matched against the rendered page text
+_PAGE_PRICES_JS = """(pattern) => {
+    const text = document.body ? document.body.innerText : '';
+    return (text.match(new RegExp(pattern, 'g')) || []).slice(0, 5);
+}"""
+
+# Init script: watch DOM mutations until an <h1> title and a price have rendered, then
+# publish them as window.__tapProduct so the agent doesn't have to sleep and re-query
+_PRODUCT_WATCH_JS = """(() => {
+    const priceRe = new RegExp(""" + json.dumps(_PRICE_RE.pattern) + """);
+    let scheduled = false;
+    const check = () => {
+        scheduled = false;
+        const h1 = document.querySelector('h1');
+        const title = h1 ? (h1.innerText || '').trim() : '';
+        const price = title && document.body ? (document.body.innerText.match(priceRe) || [])[0] : null;
+        if (title && price) {
+            window.__tapProduct = {title, price};
+            observer.disconnect();
+        }
+    };
+    const observer = new MutationObserver(() => {
+        if (!scheduled) {
+            scheduled = true;
+            requestAnimationFrame(check);
+        }
+    });
+    observer.observe(document, {subtree: true, childList: true, characterData: true});
+})();"""
+
+# () -> {count, elements} describing the first 20 form controls on the page
+_FORM_ELEMENTS_JS = """() => {
+    const all = document.querySelectorAll('input, select, textarea');
+    const elements = Array.from(all).slice(0, 20).map(el => ({
+        tag: el.tagName.toLowerCase(),
+        type: el.getAttribute('type') || 'text',
+        name: el.getAttribute('name') || 'no-name',
+        id: el.id || 'no-id',
+        placeholder: el.getAttribute('placeholder') || 'no-placeholder',
+        visible: !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length),
+        enabled: !el.disabled
+    }));
+    return {count: all.length, elements};
+}"""
+
+# Common selectors for product title
+_TITLE_SELECTORS = (
+    'h1',
+    '[data-testid="product-title"]',
+    '.product-title',
+    '.product-name',
+    '[class*="title"]',
+    '[class*="product"]',
+    'title'
+)
+
+# Common selectors for product price
+_PRICE_SELECTORS = (
+    '[data-testid="price"]',
+    '.price',
+    '.product-price',
+    '[class*="price"]',
+    '[class*="cost"]',
+    '[class*="amount"]',
+    'span:has-text("$")',
+    'span:has-text("€")',
+    'span:has-text("£")'
+)
+
+# Common selectors for "Add to Cart" buttons
+_ADD_TO_CART_SELECTORS = (
+    'button:has-text("Add to Cart")',
+    'button:has-text("Add To Cart")',
+    'button:has-text("ADD TO CART")',
+    '[data-testid="add-to-cart"]',
+    '[id*="add-to-cart"]',
+    '[class*="add-to-cart"]',
+    '.add-cart',
+    '.addToCart',
+    '#addToCart',
+    'input[value*="Add to Cart"]',
+    'button[title*="Add to Cart"]',
+    '.btn-add-cart',
+    '.cart-add'
+)
+
+# Common selectors for "Proceed to Checkout" buttons
+_PROCEED_CHECKOUT_SELECTORS = (
+    'button:has-text("Proceed to Checkout")',
+    'button:has-text("Proceed To Checkout")',
+    'button:has-text("PROCEED TO CHECKOUT")',
+    'button:has-text("Checkout")',
+    'button:has-text("CHECKOUT")',
+    'a:has-text("Proceed to Checkout")',
+    'a:has-text("Checkout")',
+    '[data-testid="proceed-to-checkout"]',
+    '[data-testid="checkout"]',
+    '[id*="proceed-checkout"]',
+    '[id*="checkout"]',
+    '[class*="proceed-checkout"]',
+    '[class*="checkout-btn"]',
+    '.proceed-checkout',
+    '.checkout-proceed',
+    '#proceedToCheckout',
+    '#checkout',
+    '.btn-checkout',
+    'input[value*="Checkout"]',
+    'button[title*="Checkout"]'
+)
+
+# Comprehensive checkout form data matching the React form structure
+_CHECKOUT_FORM_DATA = {
+    # Contact Information
+    'email': 'john.doe@example.com',
+    'phone': '+1-555-0123',
+    
+    # Shipping Address
+    'firstName': 'John',
+    'lastName': 'Doe',
+    'company': 'Example Company Inc.',
+    'address1': '123 Main Street',
+    'address2': 'Suite 456',
+    'city': 'New York',
+    'state': 'NY',
+    'zipCode': '10001',
+    'country': 'United States',
+    
+    # Billing Address (initially same as shipping)
+    'billingFirstName': 'John',
+    'billingLastName': 'Doe', 
+    'billingCompany': 'Example Company Inc.',
+    'billingAddress1': '123 Main Street',
+    'billingAddress2': 'Suite 456',
+    'billingCity': 'New York',
+    'billingState': 'NY',
+    'billingZipCode': '10001',
+    'billingCountry': 'United States',
+    
+    # Payment Information
+    'cardNumber': '4111111111111111',
+    'expiryDate': '12/25',
+    'cvv': '123',
+    'nameOnCard': 'John Doe',
+    
+    # Additional Options
+    'specialInstructions': 'Please handle with care - signature authentication sample order'
+}
+
+# Comprehensive form field selectors matching React form structure. Values stay lists
+# because the whole dict is passed to page.evaluate.
+_FORM_SELECTORS = {
+    # Contact Information
+    'email': ['#email', '[name="email"]', '[type="email"]', '[placeholder*="email"]', '[data-testid="email"]'],
+    'phone': ['#phone', '[name="phone"]', '[type="tel"]', '[placeholder*="phone"]', '[data-testid="phone"]'],
+    
+    # Shipping Address
+    'firstName': ['#firstName', '[name="firstName"]', '[placeholder*="first"]', '[data-testid="firstName"]', '[id*="first"]'],
+    'lastName': ['#lastName', '[name="lastName"]', '[placeholder*="last"]', '[data-testid="lastName"]', '[id*="last"]'],
+    'company': ['#company', '[name="company"]', '[placeholder*="company"]', '[data-testid="company"]'],
+    'address1': ['#address1', '[name="address1"]', '[placeholder*="address"]', '[data-testid="address1"]', '#address'],
+    'address2': ['#address2', '[name="address2"]', '[placeholder*="address2"]', '[data-testid="address2"]', '[placeholder*="apt"]'],
+    'city': ['#city', '[name="city"]', '[placeholder*="city"]', '[data-testid="city"]'],
+    'state': ['#state', '[name="state"]', '[placeholder*="state"]', '[data-testid="state"]'],
+    'zipCode': ['#zipCode', '#zip', '[name="zip"]', '[name="zipCode"]', '[placeholder*="zip"]', '[data-testid="zipCode"]'],
+    'country': ['#country', '[name="country"]', '[data-testid="country"]'],
+    
+    # Billing Address
+    'billingFirstName': ['#billingFirstName', '[name="billingFirstName"]', '[data-testid="billingFirstName"]'],
+    'billingLastName': ['#billingLastName', '[name="billingLastName"]', '[data-testid="billingLastName"]'],
+    'billingCompany': ['#billingCompany', '[name="billingCompany"]', '[data-testid="billingCompany"]'],
+    'billingAddress1': ['#billingAddress1', '[name="billingAddress1"]', '[data-testid="billingAddress1"]'],
+    'billingAddress2': ['#billingAddress2', '[name="billingAddress2"]', '[data-testid="billingAddress2"]'],
+    'billingCity': ['#billingCity', '[name="billingCity"]', '[data-testid="billingCity"]'],
+    'billingState': ['#billingState', '[name="billingState"]', '[data-testid="billingState"]'],
+    'billingZipCode': ['#billingZipCode', '[name="billingZipCode"]', '[data-testid="billingZipCode"]'],
+    'billingCountry': ['#billingCountry', '[name="billingCountry"]', '[data-testid="billingCountry"]'],
+    
+    # Payment Information
+    'cardNumber': ['#cardNumber', '[name="cardNumber"]', '[placeholder*="card"]', '[data-testid="cardNumber"]', '[id*="card"]'],
+    'expiryDate': ['#expiryDate', '[name="expiryDate"]', '[placeholder*="expiry"]', '[data-testid="expiryDate"]', '[placeholder*="mm/yy"]'],
+    'cvv': ['#cvv', '[name="cvv"]', '[placeholder*="cvv"]', '[data-testid="cvv"]', '[placeholder*="security"]'],
+    'nameOnCard': ['#nameOnCard', '[name="nameOnCard"]', '[placeholder*="name on card"]', '[data-testid="nameOnCard"]'],
+    
+    # Additional Options
+    'specialInstructions': ['#specialInstructions', '[name="specialInstructions"]', '[placeholder*="instructions"]', '[data-testid="specialInstructions"]', 'textarea[name*="instructions"]']
+}
+
+# Fields that only exist once the checkout form has rendered
+_CHECKOUT_FORM_READY_SELECTORS = ('#email', '[name="email"]', '#firstName', '[name="firstName"]')
+
+# Payment method controls for choosing credit card
+_PAYMENT_SELECTORS = (
+    'input[value="credit_card"]',
+    'input[name="paymentMethod"][value="credit_card"]',
+    '[data-testid="credit-card-option"]',
+    'input[type="radio"][value*="credit"]'
+)
+
+# Submit/complete order buttons, most specific first
+_SUBMIT_SELECTORS = (
+    # Primary submit buttons
+    'button[type="submit"]',
+    'input[type="submit"]',
+    
+    # Text-based button selectors
+    'button:has-text("Complete Order")',
+    'button:has-text("Place Order")',
+    'button:has-text("Submit Order")',
+    'button:has-text("Complete")',
+    'button:has-text("Submit")',
+    'button:has-text("Order")',
+    'button:has-text("Purchase")',
+    'button:has-text("Checkout")',
+    'button:has-text("Buy Now")',
+    'button:has-text("Confirm")',
+    
+    # Case-insensitive variations
+    'button:has-text("COMPLETE ORDER")',
+    'button:has-text("PLACE ORDER")',
+    'button:has-text("SUBMIT ORDER")',
+    
+    # Data attributes and IDs
+    '[data-testid="submit-order"]',
+    '[data-testid="complete-order"]',
+    '[data-testid="place-order"]',
+    '[data-testid="checkout-submit"]',
+    
+    # Class-based selectors
+    '.submit-btn',
+    '.complete-order',
+    '.place-order',
+    '.checkout-submit',
+    '.order-submit',
+    
+    # ID selectors
+    '#submit',
+    '#complete-order',
+    '#place-order',
+    '#checkout-submit',
+    '#order-submit'
+)
+
+# Comprehensive order number extraction strategies
+_ORDER_EXTRACTION_STRATEGIES = (
+    # Strategy 1: Look for "Order #" or "Order Number" text patterns
+    {
+        'name': 'Order # Text Pattern',
+        'selectors': (
+            'span:has-text("Order #")',
+            'div:has-text("Order #")',
+            'p:has-text("Order #")',
+            'span:has-text("Order Number")',
+            'div:has-text("Order Number")',
+            'p:has-text("Order Number")',
+            'h1:has-text("Order")',
+            'h2:has-text("Order")',
+            'h3:has-text("Order")'
+        ),
+        'regex': re.compile(r'Order\s*#\s*([A-Z0-9][A-Za-z0-9-]{5,})', re.IGNORECASE)
+    },
+    
+    # Strategy 2: Look for data attributes and IDs
+    {
+        'name': 'Data Attributes',
+        'selectors': (
+            '[data-testid*="order"]',
+            '[data-testid*="orderNumber"]',
+            '[data-testid*="order-id"]',
+            '[id*="order-number"]',
+            '[id*="orderNumber"]',
+            '[id*="order-id"]',
+            '[class*="order-number"]',
+            '[class*="orderNumber"]',
+            '[class*="order-id"]'
+        ),
+        'regex': re.compile(r'([A-Za-z0-9-]+)', re.IGNORECASE)
+    },
+    
+    # Strategy 3: Look for confirmation/success specific elements
+    {
+        'name': 'Confirmation Elements',
+        'selectors': (
+            '.confirmation .order-number',
+            '.success .order-number',
+            '.order-confirmation',
+            '.order-summary',
+            '.thank-you .order-number'
+        ),
+        'regex': re.compile(r'([A-Za-z0-9-]+)', re.IGNORECASE)
+    }
+)
+
+# Elements whose appearance means the success page has rendered its order number
+_ORDER_MARKER_SELECTOR = '[class*="order-number"], [data-testid*="order"], :text("Order #")'
+
+# Every strategy selector, in priority order, for a single in-page text lookup
+_ORDER_EXTRACTION_SELECTORS = [selector for strategy in _ORDER_EXTRACTION_STRATEGIES for selector in strategy['selectors']]
+
+# Order ID patterns tried against the success page URL, in order
+_ORDER_URL_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'(?i:order-success)/([A-Za-z0-9-]+)',
+    r'(?i:order)/([A-Za-z0-9-]+)',
+    r'(?i:success)/([A-Za-z0-9-]+)',
+    r'(?i:confirmation)/([A-Za-z0-9-]+)',
+    r'[?&](?i:order)[=:]([A-Za-z0-9-]+)',
+    r'[?&](?i:id)[=:]([A-Za-z0-9-]+)',
+    r'[?&](?i:order_id)[=:]([A-Za-z0-9-]+)'
+))
+
+# The URL patterns as one alternation, built like the content union below
+_ORDER_URL_UNION = re.compile(
+    '|'.join(f"(?=(?P<p{i}>{pattern.pattern}))" for i, pattern in enumerate(_ORDER_URL_PATTERNS))
+)
+
+# Order ID patterns tried against the success page HTML, in order.
+# Matches forms like "ORD-20251013090947-B12E70F6" and "Order # 123456". Generated IDs
+# are uppercase, so case folding is scoped to the order/confirmation labels; the generic
+# letter/digit runs must follow an order or confirmation label instead of matching
+# any long number on the page.
+_ORDER_CONTENT_PATTERNS = (
+    re.compile(r'(?i:order)\s*#\s*([A-Za-z0-9][A-Za-z0-9-]{5,})'),
+    re.compile(r'\b(ORD-[A-Z0-9-]+)\b'),
+    re.compile(r'\b([A-Z]{3}-[0-9]{14}-[A-Z0-9]{8})\b'),
+    re.compile(r'(?i:order)[#\s:]*([A-Za-z0-9-]{6,})'),
+    re.compile(r'(?i:confirmation)[#\s:]*([A-Za-z0-9-]{6,})'),
+    re.compile(r'(?:(?i:order|confirmation)|#)[^A-Za-z0-9]{0,10}\b([A-Z]{2,}[0-9]{4,})\b'),
+    re.compile(r'(?:(?i:order|confirmation)|#)[^0-9]{0,10}\b([0-9]{6,})\b')
+)
+
+# Literals each content pattern cannot match without, any one of which must occur in the
+# lowercased page; patterns whose literals are all missing are left out of the scan
+_ORDER_CONTENT_LITERALS = (
+    ('order',),
+    ('ord-',),
+    ('-',),
+    ('order',),
+    ('confirmation',),
+    ('order', 'confirmation', '#'),
+    ('order', 'confirmation', '#')
+)
+
+@functools.lru_cache(maxsize=None)
+def _order_content_union(ranks: tuple):
+    """Join the given content patterns into one alternation, with a named branch p<i> per
+    pattern so the page HTML is scanned once. Branches are lookaheads, so a match never
+    consumes text that a higher-priority pattern could match further on."""
+    return re.compile('|'.join(
+        f"(?=(?P<p{i}>{_ORDER_CONTENT_PATTERNS[i].pattern}))" for i in ranks
+    ))
+
+def _best_ranked_match(union, text: str) -> Optional[tuple[int, str]]:
+    """Return (rank, capture) for the highest-priority p<i> branch of union found in text, or None"""
+    best = None
+    for match in union.finditer(text):
+        rank = int(match.lastgroup[1:])
+        if best is None or rank < best[0]:
+            # Each pattern has one capture group, right after its named branch group
+            best = (rank, match.group(match.lastindex + 1))
+            if rank == 0:
+                break
+    return best
+
+def _find_order_id_in_content(content: str) -> Optional[tuple[str, str]]:
+    """Return (order_id, pattern) for the highest-priority content pattern found in one pass, or None"""
+    lowered = content.lower()
+    ranks = tuple(
+        i for i, literals in enumerate(_ORDER_CONTENT_LITERALS)
+        if any(literal in lowered for literal in literals)
+    )
+    if not ranks:
+        return None
+    
+    best = _best_ranked_match(_order_content_union(ranks), content)
+    if best is None:
+        return None
+    rank, order_id = best
+    return order_id, _ORDER_CONTENT_PATTERNS[rank].pattern
+
+# URL path fragments that mark the order success page
+_SUCCESS_URL_PARTS = ('/order-success', '/success', '/confirmation', '/thank-you', '/order-complete', '/order-confirmed')
+_SUCCESS_URL_RE = re.compile('|'.join(re.escape(part) for part in _SUCCESS_URL_PARTS), re.IGNORECASE)
+
+# Rendered text that marks an order confirmation, lowercase
+_SUCCESS_TEXT_PHRASES = (
+    'order placed successfully',
+    'thank you for your order',
+    'order confirmation',
+    'your order has been placed',
+    'order #',
+    'order number'
+)
+
+# Use the SIMD base64 codec when available; the stdlib encoder produces identical output
+try:
+    from pybase64 import b64encode_as_string as b64encode_str
+except ImportError:
+    def b64encode_str(data: bytes) -> str:
+        return base64.b64encode(data).decode('ascii')
+
 # Get RSA keys from environment variables
 def get_static_keys_from_env():
     """Get RSA keys from environment variables"""
@@ -47,11 +581,126 @@ def get_ed25519_keys_from_env():
     
     return private_key, public_key
 
-# Global variable to store product extraction results across threads
-_product_extraction_results = None
+@dataclass
+class ProductExtraction:
+    """Product details scraped by the browser thread"""
+    title: Optional[str]
+    price: Optional[str]
+    url: str
+    extraction_time: str
+    extraction_log: str
+
+def _drain(results: queue.Queue) -> None:
+    """Discard results left over from an earlier run that finished after its caller gave up"""
+    try:
+        while True:
+            results.get_nowait()
+    except queue.Empty:
+        pass
+
+# Product details handed from the browser thread to the Streamlit thread
+_product_queue: "queue.Queue[ProductExtraction]" = queue.Queue()
+
+@functools.lru_cache(maxsize=8)
+def _load_private_key(pem: str):
+    """Parse a PEM private key once and reuse the key object for later signatures"""
+    private_key = serialization.load_pem_private_key(
+        pem.encode('utf-8'),
+        password=None,
+        backend=default_backend()
+    )
+    return private_key
+
+@functools.lru_cache(maxsize=8)
+def _load_ed25519_private_key(private_b64: str):
+    """Build an Ed25519 private key from its base64 raw bytes once per key"""
+    from cryptography.hazmat.primitives.asymmetric import ed25519
+    return ed25519.Ed25519PrivateKey.from_private_bytes(base64.b64decode(private_b64))
+
+# Chromium is launched once and kept on a dedicated worker thread; the sync Playwright
+# API is bound to the thread that started it, so browser jobs are queued to that thread
+_BROWSER_LAUNCH_ARGS = [
+    '--disable-web-security',
+    '--disable-features=VizDisplayCompositor',
+    '--ignore-certificate-errors',
+    '--ignore-ssl-errors',
+    '--ignore-certificate-errors-spki-list'
+]
+# Resource types the agent never reads. They are only skipped when running headless;
+# stylesheets still load because the in-page visibility checks depend on them
+_HEADLESS_BLOCKED_RESOURCES = frozenset(('image', 'media', 'font'))
+
+# Seconds a checkout may take, counted from when it is queued on the browser thread
+_CHECKOUT_TIMEOUT = 120
+
+def _headless() -> bool:
+    """Whether TAP_HEADLESS asks for a windowless browser (1, true or yes)"""
+    return os.getenv('TAP_HEADLESS', '').strip().lower() in ('1', 'true', 'yes')
+
+_browser_jobs = queue.Queue()
+_browser_worker = None
+_browser_worker_lock = threading.Lock()
+
+def _browser_worker_loop():
+    """Own the Playwright driver and browser, running queued jobs until shutdown"""
+    playwright = None
+    browser = None
+    try:
+        while True:
+            item = _browser_jobs.get()
+            if item is None:
+                break
+            job, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            # Driver start and browser launch failures are the job's failure too, so its
+            # caller hears about them instead of waiting out its timeout
+            try:
+                if playwright is None:
+                    from playwright.sync_api import sync_playwright
+                    playwright = sync_playwright().start()
+                if browser is None or not browser.is_connected():
+                    browser = playwright.chromium.launch(headless=_headless(), args=_BROWSER_LAUNCH_ARGS)
+                future.set_result(job(browser))
+            except Exception as e:
+                logger.error(f"Browser job failed: {e}")
+                future.set_exception(e)
+    finally:
+        if browser is not None:
+            browser.close()
+        if playwright is not None:
+            playwright.stop()
+
+def _skip_unseen_resources(context):
+    """Abort image, media and font requests in a context when no browser window is shown"""
+    if _headless():
+        context.route("**/*", lambda route: route.abort() if route.request.resource_type in _HEADLESS_BLOCKED_RESOURCES else route.continue_())
+
+def _wait_for_any(page, selectors, timeout: int = 5000):
+    """Wait until one of selectors is attached; fall through after timeout ms so the fallbacks can run"""
+    try:
+        page.wait_for_selector(', '.join(selectors), timeout=timeout)
+    except Exception:
+        pass
+
+def run_in_browser(job) -> concurrent.futures.Future:
+    """Queue job(browser) on the shared browser thread; the returned future resolves to its result"""
+    global _browser_worker
+    with _browser_worker_lock:
+        if _browser_worker is None or not _browser_worker.is_alive():
+            _browser_worker = threading.Thread(target=_browser_worker_loop, daemon=True)
+            _browser_worker.start()
+    
+    future = concurrent.futures.Future()
+    _browser_jobs.put((job, future))
+    return future
 
-# Global variable to store order completion results across threads
-_order_completion_results = None
+@atexit.register
+def _shutdown_browser():
+    """Close the shared browser when the agent exits"""
+    if _browser_worker is not None and _browser_worker.is_alive():
+        _browser_jobs.put(None)
+        _browser_worker.join(timeout=5)
 
 def get_static_keys():
     """Return the static private and public keys from environment variables"""
@@ -64,28 +713,21 @@ def create_http_message_signature(private_key_pem: str, authority: str, path: st
         signature_params = f'("@authority" "@path"); created={created}; expires={expires}; keyId="{keyid}"; alg="rsa-pss-sha256"; nonce="{nonce}"; tag="{tag}"'
         
         # Create the signature base string following RFC 9421 format
-        signature_base_lines = [
-            f'"@authority": {authority}',
-            f'"@path": {path}',
-            f'"@signature-params": {signature_params}'
-        ]
-        signature_base = '\n'.join(signature_base_lines)
+        signature_base = b'\n'.join((
+            b'"@authority": ' + authority.encode('utf-8'),
+            b'"@path": ' + path.encode('utf-8'),
+            b'"@signature-params": ' + signature_params.encode('utf-8')
+        ))
         
-        print(f"🔐 RFC 9421 Signature Base String:\n{signature_base}")
-        print(f"🌐 Authority: {authority}")
-        print(f"📍 Path: {path}")
-        print(f"📋 Signature Params: {signature_params}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("RFC 9421 signature base for %s%s:\n%s", authority, path, signature_base.decode('utf-8'))
         
         # Load private key
-        private_key = serialization.load_pem_private_key(
-            private_key_pem.encode('utf-8'),
-            password=None,
-            backend=default_backend()
-        )
+        private_key = _load_private_key(private_key_pem)
         
         # Sign the signature base string using RSA-PSS (matching the algorithm declared)
         signature = private_key.sign(
-            signature_base.encode('utf-8'),
+            signature_base,
             padding.PSS(
                 mgf=padding.MGF1(hashes.SHA256()),
                 salt_length=padding.PSS.MAX_LENGTH
@@ -93,45 +735,47 @@ def create_http_message_signature(private_key_pem: str, authority: str, path: st
             hashes.SHA256()
         )
         
-        signature_b64 = base64.b64encode(signature).decode('utf-8')
+        signature_b64 = b64encode_str(signature)
         
         # Format the signature-input header (RFC 9421 format)
-        signature_input_header = f'sig2=("@authority" "@path"); created={created}; expires={expires}; keyId="{keyid}"; alg="rsa-pss-sha256"; nonce="{nonce}"; tag="{tag}"'
+        signature_input_header = f'sig2={signature_params}'
         
         # Format the signature header (RFC 9421 format)
         signature_header = f'sig2=:{signature_b64}:'
         
-        print(f"✅ Created RFC 9421 compliant signature")
-        print(f"📤 Signature-Input: {signature_input_header}")
-        print(f"🔒 Signature: {signature_header}")
+        logger.debug("Created RFC 9421 signature: Signature-Input=%s Signature=%s", signature_input_header, signature_header)
         
         return signature_input_header, signature_header
         
     except Exception as e:
-        print(f"❌ Error creating HTTP message signature: {str(e)}")
+        logger.error(f"Error creating HTTP message signature: {str(e)}")
         return "", ""
 
+@functools.lru_cache(maxsize=256)
+def _split_url(url: str) -> tuple[str, str]:
+    """Split a URL into its RFC 9421 authority and path (with query) components"""
+    parsed = urlparse(url)
+    
+    # Authority is the host (and port if not default)
+    authority = parsed.netloc
+    
+    # Path includes the path and query parameters
+    path = parsed.path
+    if parsed.query:
+        path += f"?{parsed.query}"
+    
+    return authority, path
+
 def parse_url_components(url: str) -> tuple[str, str]:
     """Parse URL to extract authority and path components for RFC 9421"""
     try:
-        from urllib.parse import urlparse
-        parsed = urlparse(url)
+        authority, path = _split_url(url)
         
-        # Authority is the host (and port if not default)
-        authority = parsed.netloc
-        
-        # Path includes the path and query parameters
-        path = parsed.path
-        if parsed.query:
-            path += f"?{parsed.query}"
-        
-        print(f"🔍 Parsed URL: {url}")
-        print(f"🌐 Authority: {authority}")
-        print(f"📍 Path: {path}")
+        logger.debug("Parsed URL %s -> authority=%s path=%s", url, authority, path)
         
         return authority, path
     except Exception as e:
-        print(f"❌ Error parsing URL: {str(e)}")
+        logger.error(f"Error parsing URL: {str(e)}")
         return "", ""
 
 def launch_with_playwright(url: str, headers: dict) -> bool:
@@ -139,51 +783,39 @@ def launch_with_playwright(url: str, headers: dict) -> bool:
     try:
         # Check if playwright is installed
         from playwright.sync_api import sync_playwright
-        import threading
-        import time
         
-        def run_browser():
-            """Run browser in a separate thread to keep it alive"""
-            with sync_playwright() as p:
-                # Launch browser with additional options to handle network issues
-                browser = p.chromium.launch(
-                    headless=False,
-                    args=[
-                        '--disable-web-security',
-                        '--disable-features=VizDisplayCompositor',
-                        '--ignore-certificate-errors',
-                        '--ignore-ssl-errors',
-                        '--ignore-certificate-errors-spki-list'
-                    ]
-                )
-                
-                # Create context with signature headers applied to all requests
-                context = browser.new_context(
-                    extra_http_headers=headers,
-                    ignore_https_errors=True,
-                    viewport={'width': 1280, 'height': 720}
-                )
-                
+        # Set by the browser thread once the page is open
+        ready = threading.Event()
+        
+        def run_browser(browser):
+            """Extract product details in a fresh context on the shared browser"""
+            # Create context with signature headers applied to all requests; closed on exit
+            with browser.new_context(
+                extra_http_headers=headers,
+                ignore_https_errors=True,
+                viewport={'width': 1280, 'height': 720}
+            ) as context:
+                _skip_unseen_resources(context)
                 page = context.new_page()
+                ready.set()
                 
-                print(f"🔧 Browser context created with signature headers")
-                print("📨 Signature Headers:")
-                for key, value in headers.items():
-                    if key == 'signature':
-                        print(f"   {key}: {value[:20]}..." if len(value) > 20 else f"   {key}: {value}")
-                    else:
-                        print(f"   {key}: {value}")
+                logger.info("🔧 Browser context created with signature headers")
+                if logger.isEnabledFor(logging.DEBUG):
+                    for key, value in headers.items():
+                        if key == 'signature' and len(value) > 20:
+                            value = f"{value[:20]}..."
+                        logger.debug("Signature header %s: %s", key, value)
                 
                 # Add request/response interceptors to handle failed API calls
                 def handle_request(request):
                     # Log API calls
                     if 'api' in request.url.lower() or request.method == 'OPTIONS':
-                        print(f"API Request: {request.method} {request.url}")
+                        logger.debug("API Request: %s %s", request.method, request.url)
                 
                 def handle_response(response):
                     # Handle failed OPTIONS and API requests
                     if response.status >= 400:
-                        print(f"Failed Request: {response.status} {response.request.method} {response.url}")
+                        logger.debug("Failed Request: %s %s %s", response.status, response.request.method, response.url)
                         # Don't let failed API calls crash the browser
                         return
                 
@@ -194,71 +826,47 @@ def launch_with_playwright(url: str, headers: dict) -> bool:
                 # Handle console errors from the website
                 def handle_console(msg):
                     if msg.type == 'error':
-                        print(f"Console Error: {msg.text}")
+                        logger.debug("Console Error: %s", msg.text)
                 
                 page.on('console', handle_console)
+                page.add_init_script(_PRODUCT_WATCH_JS)
                 
                 # Navigate to the URL with error handling
                 try:
                     page.goto(url, wait_until='domcontentloaded', timeout=30000)
-                    print(f"✅ Successfully navigated to: {url}")
-                    
-                    # Wait a bit for the page to fully load
-                    time.sleep(3)
+                    logger.info("✅ Successfully navigated to: %s", url)
                     
                     # Try to extract product information
                     product_info = {}
                     
-                    # Common selectors for product title
-                    title_selectors = [
-                        'h1',
-                        '[data-testid="product-title"]',
-                        '.product-title',
-                        '.product-name',
-                        '[class*="title"]',
-                        '[class*="product"]',
-                        'title'
-                    ]
-                    
-                    # Common selectors for product price
-                    price_selectors = [
-                        '[data-testid="price"]',
-                        '.price',
-                        '.product-price',
-                        '[class*="price"]',
-                        '[class*="cost"]',
-                        '[class*="amount"]',
-                        'span:has-text("$")',
-                        'span:has-text("€")',
-                        'span:has-text("£")'
-                    ]
+                    # Wait up to 3 seconds for the in-page watcher to report the title and price
+                    try:
+                        reported = page.wait_for_function("() => window.__tapProduct", timeout=3000).json_value()
+                        product_info.update(reported)
+                        logger.info("📦 Product Title: %s", reported['title'])
+                        logger.info("💰 Product Price: %s", reported['price'])
+                    except Exception:
+                        pass
                     
-                    # Extract product title
-                    for selector in title_selectors:
+                    # Extract product title (first selector with more than 3 characters of text)
+                    if not product_info.get('title'):
                         try:
-                            title_element = page.query_selector(selector)
-                            if title_element:
-                                title_text = title_element.inner_text().strip()
-                                if title_text and len(title_text) > 3:  # Valid title
-                                    product_info['title'] = title_text
-                                    print(f"📦 Product Title: {title_text}")
-                                    break
-                        except:
-                            continue
+                            title_text = page.evaluate(_FIRST_MATCHING_TEXT_JS, [list(_TITLE_SELECTORS), r'^[\s\S]{4,}$'])
+                            if title_text:
+                                product_info['title'] = title_text
+                                logger.info("📦 Product Title: %s", title_text)
+                        except Exception:
+                            pass
                     
-                    # Extract product price
-                    for selector in price_selectors:
+                    # Extract product price (first selector whose text has a currency symbol or digit)
+                    if not product_info.get('price'):
                         try:
-                            price_element = page.query_selector(selector)
-                            if price_element:
-                                price_text = price_element.inner_text().strip()
-                                # Check if it looks like a price (contains currency symbols or numbers)
-                                if price_text and any(char in price_text for char in ['$', '€', '£', '¥']) or any(char.isdigit() for char in price_text):
-                                    product_info['price'] = price_text
-                                    print(f"💰 Product Price: {price_text}")
-                                    break
-                        except:
-                            continue
+                            price_text = page.evaluate(_FIRST_MATCHING_TEXT_JS, [list(_PRICE_SELECTORS), r'[$€£¥0-9]'])
+                            if price_text:
+                                product_info['price'] = price_text
+                                logger.info("💰 Product Price: %s", price_text)
+                        except Exception:
+                            pass
                     
                     # If we couldn't find specific elements, try generic extraction
                     if not product_info.get('title'):
@@ -266,78 +874,61 @@ def launch_with_playwright(url: str, headers: dict) -> bool:
                             page_title = page.title()
                             if page_title:
                                 product_info['title'] = page_title
-                                print(f"📦 Page Title: {page_title}")
+                                logger.info("📦 Page Title: %s", page_title)
                         except:
                             pass
                     
                     if not product_info.get('price'):
                         try:
-                            # Look for any text that contains currency symbols
-                            all_text = page.content()
-                            import re
-                            price_pattern = r'[\$€£¥]\s*\d+(?:[.,]\d{2})?|\d+(?:[.,]\d{2})?\s*[\$€£¥]'
-                            prices = re.findall(price_pattern, all_text)
+                            # Look for any text that contains currency symbols, scanning in the page
+                            prices = page.evaluate(_PAGE_PRICES_JS, _PRICE_RE.pattern)
                             if prices:
                                 product_info['price'] = prices[0]
-                                print(f"💰 Found Price: {prices[0]}")
+                                logger.info("💰 Found Price: %s", prices[0])
                         except:
                             pass
                     
-                    # Log the results and store globally
-                    global _product_extraction_results
-                    import datetime
-                    
-                    extraction_log = []
-                    extraction_log.append("🛍️  PRODUCT EXTRACTION RESULTS")
-                    extraction_log.append("="*50)
-                    
-                    if product_info.get('title'):
-                        extraction_log.append(f"📦 Title: {product_info['title']}")
-                        print(f"📦 Title: {product_info['title']}")
-                    else:
-                        extraction_log.append("❌ Title: Not found")
-                        print("❌ Title: Not found")
-                    
-                    if product_info.get('price'):
-                        extraction_log.append(f"💰 Price: {product_info['price']}")
-                        print(f"💰 Price: {product_info['price']}")
-                    else:
-                        extraction_log.append("❌ Price: Not found")
-                        print("❌ Price: Not found")
+                    # Log the results and hand them to the Streamlit thread
+                    title = product_info.get('title')
+                    price = product_info.get('price')
+                    extraction_log = (
+                        f"🛍️  PRODUCT EXTRACTION RESULTS\n{'='*50}\n"
+                        f"{f'📦 Title: {title}' if title else '❌ Title: Not found'}\n"
+                        f"{f'💰 Price: {price}' if price else '❌ Price: Not found'}\n"
+                        f"{'='*50}"
+                    )
                     
-                    extraction_log.append("="*50)
+                    _product_queue.put(ProductExtraction(
+                        title=title,
+                        price=price,
+                        url=url,
+                        extraction_time=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                        extraction_log=extraction_log
+                    ))
                     
-                    # Store results globally
-                    _product_extraction_results = {
-                        'title': product_info.get('title'),
-                        'price': product_info.get('price'),
-                        'url': url,
-                        'extraction_time': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        'extraction_log': '\n'.join(extraction_log)
-                    }
+                    logger.info("%s", extraction_log)
                     
-                    print("\n" + '\n'.join(extraction_log))
-                    
-                    # Wait a moment before closing
-                    print("⏳ Closing browser in 3 seconds...")
-                    time.sleep(3)
+                    # Leave the window up for a moment when watching the agent; TAP_KEEP_BROWSER_OPEN=1
+                    if os.getenv('TAP_KEEP_BROWSER_OPEN'):
+                        logger.info("⏳ Closing browser window in 3 seconds...")
+                        page.wait_for_timeout(3000)
                     
                 except Exception as e:
-                    print(f"❌ Navigation or extraction error: {e}")
-                
-                # Close the browser automatically
-                try:
-                    print("🔒 Closing browser...")
-                    browser.close()
-                except Exception as e:
-                    print(f"Error closing browser: {e}")
-        
-        # Start browser in a separate thread so it doesn't block Streamlit
-        browser_thread = threading.Thread(target=run_browser, daemon=True)
-        browser_thread.start()
-        
-        # Give it a moment to start
-        time.sleep(2)
+                    logger.error("❌ Navigation or extraction error: %s", e)
+        
+        # Run on the shared browser thread so it doesn't block Streamlit
+        _drain(_product_queue)
+        browser_job = run_in_browser(run_browser)
+        # A job that fails before opening its page (e.g. Chromium won't launch) wakes us too
+        browser_job.add_done_callback(lambda _: ready.set())
+        
+        # Return as soon as the browser is usable rather than after a fixed delay
+        if not ready.wait(timeout=15):
+            st.error("Error launching browser: no page opened within 15 seconds")
+            return False
+        if browser_job.done() and browser_job.exception() is not None:
+            st.error(f"Error launching browser: {browser_job.exception()}")
+            return False
         
         st.success("✅ Browser launched with headers!")
         st.info("🤖 Browser will automatically extract product info and close.")
@@ -355,874 +946,542 @@ def complete_checkout_with_playwright(product_url: str, cart_url: str, checkout_
     try:
         # Check if playwright is installed
         from playwright.sync_api import sync_playwright
-        import threading
-        import time
-        import re
-        
-        # Reset order completion results
-        global _order_completion_results
-        _order_completion_results = None
         
         # Ensure headers are provided
         if headers is None:
             headers = {}
         
-        def run_full_checkout():
-            """Run complete checkout process in a separate thread"""
-            with sync_playwright() as p:
-                # Launch browser with additional options
-                browser = p.chromium.launch(
-                    headless=False,
-                    args=[
-                        '--disable-web-security',
-                        '--disable-features=VizDisplayCompositor',
-                        '--ignore-certificate-errors',
-                        '--ignore-ssl-errors'
-                    ]
-                )
-                
-                # Create context with signature headers applied to all requests
-                print(f"🔧 Setting up browser context with signature headers")
-                context = browser.new_context(
-                    extra_http_headers=headers,
-                    ignore_https_errors=True,
-                    viewport={'width': 1280, 'height': 720}
-                )
-                
+        # The job enforces the deadline itself so a timed-out checkout frees the browser thread
+        deadline = time.monotonic() + _CHECKOUT_TIMEOUT
+        
+        def check_deadline(page):
+            """Abort once the deadline has passed; otherwise cap Playwright waits at 30s or the time left"""
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f'Checkout exceeded {_CHECKOUT_TIMEOUT} seconds')
+            page.set_default_timeout(min(30, remaining) * 1000)
+        
+        def run_full_checkout(browser):
+            """Run complete checkout process in a fresh context on the shared browser"""
+            # Create context with signature headers applied to all requests; closed on exit
+            logger.info("🔧 Setting up browser context with signature headers")
+            with browser.new_context(
+                extra_http_headers=headers,
+                ignore_https_errors=True,
+                viewport={'width': 1280, 'height': 720}
+            ) as context:
+                _skip_unseen_resources(context)
                 page = context.new_page()
                 
                 # Log headers being sent
-                print("🛒 STARTING COMPLETE CHECKOUT PROCESS")
-                print("="*50)
-                print(f"📦 Product URL: {product_url}")
-                print(f"🛒 Cart URL: {cart_url}")
-                print(f"💳 Checkout URL: {checkout_url}")
-                print("📨 Signature Headers:")
-                for key, value in headers.items():
-                    if key == 'signature':
-                        print(f"   {key}: {value[:20]}..." if len(value) > 20 else f"   {key}: {value}")
-                    else:
-                        print(f"   {key}: {value}")
-                print("="*50)
+                logger.info("🛒 STARTING COMPLETE CHECKOUT PROCESS")
+                logger.info("📦 Product URL: %s", product_url)
+                logger.info("🛒 Cart URL: %s", cart_url)
+                logger.info("💳 Checkout URL: %s", checkout_url)
+                if logger.isEnabledFor(logging.DEBUG):
+                    for key, value in headers.items():
+                        if key == 'signature' and len(value) > 20:
+                            value = f"{value[:20]}..."
+                        logger.debug("Signature header %s: %s", key, value)
                 
                 try:
+                    check_deadline(page)
                     # STEP 1: Navigate to product page
-                    print(f"🛍️ STEP 1: Navigating to product page: {product_url}")
-                    page.goto(product_url, wait_until='domcontentloaded', timeout=30000)
-                    print(f"✅ Successfully navigated to product page")
+                    logger.info("🛍️ STEP 1: Navigating to product page: %s", product_url)
+                    page.goto(product_url, wait_until='domcontentloaded')
+                    logger.info("✅ Successfully navigated to product page")
                     
-                    # Wait for page to load
-                    time.sleep(3)
+                    # Wait for the add-to-cart control rather than a fixed delay
+                    _wait_for_any(page, _ADD_TO_CART_SELECTORS)
                     
+                    check_deadline(page)
                     # STEP 2: Find and click "Add to Cart" button
-                    print(f"🛒 STEP 2: Looking for 'Add to Cart' button...")
-                    
-                    # Common selectors for "Add to Cart" buttons
-                    add_to_cart_selectors = [
-                        'button:has-text("Add to Cart")',
-                        'button:has-text("Add To Cart")',
-                        'button:has-text("ADD TO CART")',
-                        '[data-testid="add-to-cart"]',
-                        '[id*="add-to-cart"]',
-                        '[class*="add-to-cart"]',
-                        '.add-cart',
-                        '.addToCart',
-                        '#addToCart',
-                        'input[value*="Add to Cart"]',
-                        'button[title*="Add to Cart"]',
-                        '.btn-add-cart',
-                        '.cart-add'
-                    ]
+                    logger.info("🛒 STEP 2: Looking for 'Add to Cart' button...")
                     
                     cart_added = False
-                    for selector in add_to_cart_selectors:
-                        try:
-                            add_button = page.query_selector(selector)
-                            if add_button and add_button.is_visible():
-                                print(f"🎯 Found 'Add to Cart' button: {selector}")
-                                add_button.click()
-                                print(f"✅ Successfully clicked 'Add to Cart'")
-                                cart_added = True
-                                break
-                        except Exception as e:
-                            continue
+                    try:
+                        add_button = page.evaluate_handle(_FIRST_VISIBLE_JS, list(_ADD_TO_CART_SELECTORS)).as_element()
+                        if add_button:
+                            logger.info("🎯 Found 'Add to Cart' button")
+                            add_button.click()
+                            logger.info("✅ Successfully clicked 'Add to Cart'")
+                            cart_added = True
+                    except Exception as e:
+                        pass
                     
                     if not cart_added:
-                        print("❌ Could not find 'Add to Cart' button")
+                        logger.warning("❌ Could not find 'Add to Cart' button")
                         # Try to find any button that might be add to cart
                         try:
-                            all_buttons = page.query_selector_all('button')
-                            for button in all_buttons[:10]:  # Check first 10 buttons
-                                text = button.inner_text().lower()
-                                if any(phrase in text for phrase in ['add', 'cart', 'buy', 'purchase']):
-                                    print(f"🔄 Trying button with text: {text}")
-                                    button.click()
-                                    cart_added = True
-                                    break
+                            # Check first 10 buttons in one round-trip
+                            match = page.evaluate(_FIRST_BUTTON_WITH_TEXT_JS, ['button', 10, ['add', 'cart', 'buy', 'purchase']])
+                            if match:
+                                logger.info("🔄 Trying button with text: %s", match['text'])
+                                page.locator('button').nth(match['index']).click()
+                                cart_added = True
                         except:
                             pass
                     
                     if cart_added:
-                        # Wait a moment for cart update
-                        time.sleep(2)
-                        print("✅ Product added to cart successfully")
+                        # Let the cart update request settle before leaving the page
+                        try:
+                            page.wait_for_load_state('networkidle', timeout=3000)
+                        except Exception:
+                            pass
+                        logger.info("✅ Product added to cart successfully")
                     else:
-                        print("⚠️ Could not add product to cart, proceeding anyway")
+                        logger.warning("⚠️ Could not add product to cart, proceeding anyway")
                     
+                    check_deadline(page)
                     # STEP 3: Navigate to cart page
-                    print(f"🛒 STEP 3: Navigating to cart page: {cart_url}")
-                    page.goto(cart_url, wait_until='domcontentloaded', timeout=30000)
-                    print(f"✅ Successfully navigated to cart page")
+                    logger.info("🛒 STEP 3: Navigating to cart page: %s", cart_url)
+                    page.goto(cart_url, wait_until='domcontentloaded')
+                    logger.info("✅ Successfully navigated to cart page")
                     
-                    # Wait for cart page to load
-                    time.sleep(3)
+                    # Wait for the proceed-to-checkout control to render
+                    _wait_for_any(page, _PROCEED_CHECKOUT_SELECTORS)
                     
+                    check_deadline(page)
                     # STEP 4: Find and click "Proceed to Checkout" button
-                    print(f"➡️ STEP 4: Looking for 'Proceed to Checkout' button...")
-                    
-                    # Common selectors for "Proceed to Checkout" buttons
-                    proceed_checkout_selectors = [
-                        'button:has-text("Proceed to Checkout")',
-                        'button:has-text("Proceed To Checkout")',
-                        'button:has-text("PROCEED TO CHECKOUT")',
-                        'button:has-text("Checkout")',
-                        'button:has-text("CHECKOUT")',
-                        'a:has-text("Proceed to Checkout")',
-                        'a:has-text("Checkout")',
-                        '[data-testid="proceed-to-checkout"]',
-                        '[data-testid="checkout"]',
-                        '[id*="proceed-checkout"]',
-                        '[id*="checkout"]',
-                        '[class*="proceed-checkout"]',
-                        '[class*="checkout-btn"]',
-                        '.proceed-checkout',
-                        '.checkout-proceed',
-                        '#proceedToCheckout',
-                        '#checkout',
-                        '.btn-checkout',
-                        'input[value*="Checkout"]',
-                        'button[title*="Checkout"]'
-                    ]
+                    logger.info("➡️ STEP 4: Looking for 'Proceed to Checkout' button...")
                     
                     checkout_proceeded = False
-                    for selector in proceed_checkout_selectors:
-                        try:
-                            proceed_button = page.query_selector(selector)
-                            if proceed_button and proceed_button.is_visible():
-                                print(f"🎯 Found 'Proceed to Checkout' button: {selector}")
-                                proceed_button.click()
-                                print(f"✅ Successfully clicked 'Proceed to Checkout'")
-                                checkout_proceeded = True
-                                break
-                        except Exception as e:
-                            continue
+                    try:
+                        proceed_button = page.evaluate_handle(_FIRST_VISIBLE_JS, list(_PROCEED_CHECKOUT_SELECTORS)).as_element()
+                        if proceed_button:
+                            logger.info("🎯 Found 'Proceed to Checkout' button")
+                            proceed_button.click()
+                            logger.info("✅ Successfully clicked 'Proceed to Checkout'")
+                            checkout_proceeded = True
+                    except Exception as e:
+                        pass
                     
                     if not checkout_proceeded:
-                        print("❌ Could not find 'Proceed to Checkout' button")
+                        logger.warning("❌ Could not find 'Proceed to Checkout' button")
                         # Try to find any button that might be proceed to checkout
                         try:
-                            all_buttons = page.query_selector_all('button, a')
-                            for button in all_buttons[:15]:  # Check first 15 buttons/links
-                                text = button.inner_text().lower()
-                                if any(phrase in text for phrase in ['proceed', 'checkout', 'continue', 'next']):
-                                    print(f"🔄 Trying button with text: {text}")
-                                    button.click()
-                                    checkout_proceeded = True
-                                    break
+                            # Check first 15 buttons/links in one round-trip
+                            match = page.evaluate(_FIRST_BUTTON_WITH_TEXT_JS, ['button, a', 15, ['proceed', 'checkout', 'continue', 'next']])
+                            if match:
+                                logger.info("🔄 Trying button with text: %s", match['text'])
+                                page.locator('button, a').nth(match['index']).click()
+                                checkout_proceeded = True
                         except:
                             pass
                     
                     if checkout_proceeded:
-                        # Wait for navigation to checkout page
-                        time.sleep(3)
-                        print("✅ Successfully proceeded to checkout")
+                        logger.info("✅ Successfully proceeded to checkout")
                     else:
-                        print("⚠️ Could not proceed to checkout, trying direct navigation")
+                        logger.warning("⚠️ Could not proceed to checkout, trying direct navigation")
                         # Fallback: navigate directly to checkout page
-                        print(f"🛒 STEP 4b: Direct navigation to checkout: {checkout_url}")
-                        page.goto(checkout_url, wait_until='domcontentloaded', timeout=30000)
+                        logger.info("🛒 STEP 4b: Direct navigation to checkout: %s", checkout_url)
+                        page.goto(checkout_url, wait_until='domcontentloaded')
                     
-                    # STEP 5: We should now be on the checkout page
-                    print(f"✅ Now on checkout page (current URL: {page.url})")
+                    # Wait for the checkout form to render, whichever way we got here
+                    _wait_for_any(page, _CHECKOUT_FORM_READY_SELECTORS, timeout=10000)
                     
-                    # Wait for checkout page to load
-                    time.sleep(3)
+                    # STEP 5: We should now be on the checkout page
+                    logger.info("✅ Now on checkout page (current URL: %s)", page.url)
                     
+                    check_deadline(page)
                     # STEP 5: Fill out checkout form
-                    print(f"📝 STEP 5: Filling out comprehensive checkout form...")
+                    logger.info("📝 STEP 5: Filling out comprehensive checkout form...")
                     
-                    # First, let's scan the page to see what form elements are available
-                    print("🔍 Scanning page for form elements...")
-                    try:
-                        all_inputs = page.query_selector_all('input, select, textarea')
-                        print(f"📋 Found {len(all_inputs)} form elements on the page:")
-                        
-                        for i, input_elem in enumerate(all_inputs[:20]):  # Show first 20 elements
-                            try:
-                                try:
-                                    tag = input_elem.evaluate('el => el.tagName') or 'unknown'
-                                except:
-                                    tag = input_elem.get_attribute('tagName') or 'unknown'
-                                    
-                                input_type = input_elem.get_attribute('type') or 'text'
-                                name = input_elem.get_attribute('name') or 'no-name'
-                                input_id = input_elem.get_attribute('id') or 'no-id'
-                                placeholder = input_elem.get_attribute('placeholder') or 'no-placeholder'
-                                visible = input_elem.is_visible()
-                                enabled = input_elem.is_enabled()
-                                
-                                print(f"   {i+1}. {tag.lower()}[{input_type}] name='{name}' id='{input_id}' placeholder='{placeholder}' visible={visible} enabled={enabled}")
-                            except:
-                                print(f"   {i+1}. <error reading element>")
-                                
-                        if len(all_inputs) > 20:
-                            print(f"   ... and {len(all_inputs) - 20} more elements")
+                    # Element scan is diagnostic only; enable it with TAP_DEBUG_FORMS=1
+                    if os.getenv('TAP_DEBUG_FORMS'):
+                        logger.info("🔍 Scanning page for form elements...")
+                        try:
+                            form_scan = page.evaluate(_FORM_ELEMENTS_JS)
+                            logger.info("📋 Found %s form elements on the page:", form_scan['count'])
                             
-                    except Exception as e:
-                        print(f"⚠️ Error scanning form elements: {e}")
+                            for i, elem in enumerate(form_scan['elements']):  # Show first 20 elements
+                                logger.info("%s. %s[%s] name='%s' id='%s' placeholder='%s' visible=%s enabled=%s", i+1, elem['tag'], elem['type'], elem['name'], elem['id'], elem['placeholder'], elem['visible'], elem['enabled'])
+                            
+                            if form_scan['count'] > 20:
+                                logger.info("... and %s more elements", form_scan['count'] - 20)
+                                
+                        except Exception as e:
+                            logger.warning("⚠️ Error scanning form elements: %s", e)
                     
-                    print("="*50)
+                    # Resolve every field to its first visible, enabled element in one round-trip
+                    try:
+                        resolved_fields = page.evaluate(_RESOLVE_FIELDS_JS, _FORM_SELECTORS)
+                    except Exception as e:
+                        logger.warning("⚠️ Error resolving form fields: %s", e)
+                        resolved_fields = {}
                     
-                    # Comprehensive checkout form data matching the React form structure
-                    checkout_info = {
-                        # Contact Information
-                        'email': 'john.doe@example.com',
-                        'phone': '+1-555-0123',
-                        
-                        # Shipping Address
-                        'firstName': 'John',
-                        'lastName': 'Doe',
-                        'company': 'Example Company Inc.',
-                        'address1': '123 Main Street',
-                        'address2': 'Suite 456',
-                        'city': 'New York',
-                        'state': 'NY',
-                        'zipCode': '10001',
-                        'country': 'United States',
-                        
-                        # Billing Address (initially same as shipping)
-                        'billingFirstName': 'John',
-                        'billingLastName': 'Doe', 
-                        'billingCompany': 'Example Company Inc.',
-                        'billingAddress1': '123 Main Street',
-                        'billingAddress2': 'Suite 456',
-                        'billingCity': 'New York',
-                        'billingState': 'NY',
-                        'billingZipCode': '10001',
-                        'billingCountry': 'United States',
-                        
-                        # Payment Information
-                        'cardNumber': '4111111111111111',
-                        'expiryDate': '12/25',
-                        'cvv': '123',
-                        'nameOnCard': 'John Doe',
-                        
-                        # Additional Options
-                        'specialInstructions': 'Please handle with care - signature authentication sample order'
-                    }
+                    # Write every plain text field in one round-trip; fields that don't take the value
+                    # are filled one by one below
+                    text_entries = [
+                        [field, target['selector'], _CHECKOUT_FORM_DATA[field]]
+                        for field, target in resolved_fields.items()
+                        if field in _CHECKOUT_FORM_DATA and target['tag'] in ('input', 'textarea')
+                        and target['type'] not in ('checkbox', 'radio')
+                    ]
+                    try:
+                        batch_filled = set(page.evaluate(_FILL_FIELDS_JS, text_entries))
+                    except Exception as e:
+                        logger.warning("⚠️ Batched field fill failed, filling fields individually: %s", e)
+                        batch_filled = set()
                     
-                    # Comprehensive form field selectors matching React form structure
-                    form_selectors = {
-                        # Contact Information
-                        'email': ['#email', '[name="email"]', '[type="email"]', '[placeholder*="email"]', '[data-testid="email"]'],
-                        'phone': ['#phone', '[name="phone"]', '[type="tel"]', '[placeholder*="phone"]', '[data-testid="phone"]'],
-                        
-                        # Shipping Address
-                        'firstName': ['#firstName', '[name="firstName"]', '[placeholder*="first"]', '[data-testid="firstName"]', '[id*="first"]'],
-                        'lastName': ['#lastName', '[name="lastName"]', '[placeholder*="last"]', '[data-testid="lastName"]', '[id*="last"]'],
-                        'company': ['#company', '[name="company"]', '[placeholder*="company"]', '[data-testid="company"]'],
-                        'address1': ['#address1', '[name="address1"]', '[placeholder*="address"]', '[data-testid="address1"]', '#address'],
-                        'address2': ['#address2', '[name="address2"]', '[placeholder*="address2"]', '[data-testid="address2"]', '[placeholder*="apt"]'],
-                        'city': ['#city', '[name="city"]', '[placeholder*="city"]', '[data-testid="city"]'],
-                        'state': ['#state', '[name="state"]', '[placeholder*="state"]', '[data-testid="state"]'],
-                        'zipCode': ['#zipCode', '#zip', '[name="zip"]', '[name="zipCode"]', '[placeholder*="zip"]', '[data-testid="zipCode"]'],
-                        'country': ['#country', '[name="country"]', '[data-testid="country"]'],
-                        
-                        # Billing Address
-                        'billingFirstName': ['#billingFirstName', '[name="billingFirstName"]', '[data-testid="billingFirstName"]'],
-                        'billingLastName': ['#billingLastName', '[name="billingLastName"]', '[data-testid="billingLastName"]'],
-                        'billingCompany': ['#billingCompany', '[name="billingCompany"]', '[data-testid="billingCompany"]'],
-                        'billingAddress1': ['#billingAddress1', '[name="billingAddress1"]', '[data-testid="billingAddress1"]'],
-                        'billingAddress2': ['#billingAddress2', '[name="billingAddress2"]', '[data-testid="billingAddress2"]'],
-                        'billingCity': ['#billingCity', '[name="billingCity"]', '[data-testid="billingCity"]'],
-                        'billingState': ['#billingState', '[name="billingState"]', '[data-testid="billingState"]'],
-                        'billingZipCode': ['#billingZipCode', '[name="billingZipCode"]', '[data-testid="billingZipCode"]'],
-                        'billingCountry': ['#billingCountry', '[name="billingCountry"]', '[data-testid="billingCountry"]'],
-                        
-                        # Payment Information
-                        'cardNumber': ['#cardNumber', '[name="cardNumber"]', '[placeholder*="card"]', '[data-testid="cardNumber"]', '[id*="card"]'],
-                        'expiryDate': ['#expiryDate', '[name="expiryDate"]', '[placeholder*="expiry"]', '[data-testid="expiryDate"]', '[placeholder*="mm/yy"]'],
-                        'cvv': ['#cvv', '[name="cvv"]', '[placeholder*="cvv"]', '[data-testid="cvv"]', '[placeholder*="security"]'],
-                        'nameOnCard': ['#nameOnCard', '[name="nameOnCard"]', '[placeholder*="name on card"]', '[data-testid="nameOnCard"]'],
-                        
-                        # Additional Options
-                        'specialInstructions': ['#specialInstructions', '[name="specialInstructions"]', '[placeholder*="instructions"]', '[data-testid="specialInstructions"]', 'textarea[name*="instructions"]']
-                    }
+                    # fill() already fails if the value can't be written; reading it back is a debug aid
+                    verify_fills = bool(os.getenv('TAP_VERIFY_FILLS'))
                     
                     # Fill form fields with enhanced logic and better error handling
                     fields_filled = 0
-                    for field, value in checkout_info.items():
+                    generic_fields = {}
+                    for field, value in _CHECKOUT_FORM_DATA.items():
                         field_filled = False
-                        print(f"🔍 Attempting to fill field: {field}")
+                        logger.debug("Attempting to fill field: %s", field)
                         
-                        for selector in form_selectors.get(field, []):
+                        target = resolved_fields.get(field)
+                        if target:
+                            selector = target['selector']
+                            tag_name = target['tag']
+                            element_type = target['type']
+                            logger.debug("Field %s resolved to %s (tag=%s, type=%s)", field, selector, tag_name, element_type)
+                            
                             try:
-                                element = page.query_selector(selector)
-                                if element:
-                                    # Check if element is visible and enabled
-                                    is_visible = element.is_visible()
-                                    is_enabled = element.is_enabled()
-                                    
-                                    print(f"   🎯 Found element with selector: {selector}")
-                                    print(f"      Visible: {is_visible}, Enabled: {is_enabled}")
+                                element = page.locator(selector).first
+                                
+                                # Check if it's a select dropdown
+                                if tag_name == 'select':
+                                    element.select_option(value)
+                                    logger.debug("✅ Selected %s: %s", field, value)
+                                    field_filled = True
+                                    fields_filled += 1
+                                # Check if it's a checkbox
+                                elif element_type == 'checkbox':
+                                    # For now, we'll leave checkboxes unchecked (billingDifferent=false, newsletter=false)
+                                    logger.debug("📋 Skipped checkbox %s (keeping default state)", field)
+                                    field_filled = True
+                                # Check if it's a radio button
+                                elif element_type == 'radio':
+                                    element.check()
+                                    logger.debug("✅ Selected radio %s: %s", field, value)
+                                    field_filled = True
+                                    fields_filled += 1
+                                # Text field already written by the batched in-page fill
+                                elif field in batch_filled:
+                                    logger.debug("✅ Filled %s: %s", field, value)
+                                    field_filled = True
+                                    fields_filled += 1
+                                # Regular input field (text, email, tel, etc.)
+                                else:
+                                    # Fill the field (this automatically clears and replaces content)
+                                    element.fill(value)
                                     
-                                    if is_visible and is_enabled:
-                                        # Get element tag and type safely
+                                    if not verify_fills:
+                                        logger.debug("✅ Filled %s: %s", field, value)
+                                        field_filled = True
+                                        fields_filled += 1
+                                    else:
+                                        # Verify the value was set
                                         try:
-                                            tag_name = element.evaluate('el => el.tagName')
+                                            filled_value = element.input_value()
+                                            if filled_value == value:
+                                                logger.debug("✅ Filled %s: %s", field, value)
+                                                field_filled = True
+                                                fields_filled += 1
+                                            else:
+                                                logger.warning("⚠️ Value mismatch for %s. Expected: %s, Got: %s", field, value, filled_value)
                                         except:
-                                            tag_name = element.get_attribute('tagName')
-                                        
-                                        element_type = element.get_attribute('type')
-                                        
-                                        print(f"      Tag: {tag_name}, Type: {element_type}")
-                                        
-                                        # Check if it's a select dropdown
-                                        if tag_name and tag_name.lower() == 'select':
-                                            element.select_option(value)
-                                            print(f"✅ Selected {field}: {value}")
+                                            # Some elements don't support input_value(), just assume it worked
+                                            logger.debug("✅ Filled %s: %s (verification skipped)", field, value)
                                             field_filled = True
                                             fields_filled += 1
-                                            break
-                                        # Check if it's a checkbox
-                                        elif element_type and element_type.lower() == 'checkbox':
-                                            # For now, we'll leave checkboxes unchecked (billingDifferent=false, newsletter=false)
-                                            print(f"📋 Skipped checkbox {field} (keeping default state)")
-                                            field_filled = True
-                                            break
-                                        # Check if it's a radio button
-                                        elif element_type and element_type.lower() == 'radio':
-                                            element.check()
-                                            print(f"✅ Selected radio {field}: {value}")
-                                            field_filled = True
-                                            fields_filled += 1
-                                            break
-                                        # Regular input field (text, email, tel, etc.)
-                                        else:
-                                            # Fill the field (this automatically clears and replaces content)
-                                            element.fill(value)
-                                            
-                                            # Verify the value was set
-                                            try:
-                                                filled_value = element.input_value()
-                                                if filled_value == value:
-                                                    print(f"✅ Filled {field}: {value}")
-                                                    field_filled = True
-                                                    fields_filled += 1
-                                                    break
-                                                else:
-                                                    print(f"⚠️ Value mismatch for {field}. Expected: {value}, Got: {filled_value}")
-                                            except:
-                                                # Some elements don't support input_value(), just assume it worked
-                                                print(f"✅ Filled {field}: {value} (verification skipped)")
-                                                field_filled = True
-                                                fields_filled += 1
-                                                break
-                                    else:
-                                        print(f"      Element not visible or enabled, skipping")
-                                else:
-                                    print(f"   ❌ Element not found for selector: {selector}")
-                                    
                             except Exception as e:
-                                print(f"   ⚠️ Error with selector {selector}: {str(e)}")
-                                continue
+                                logger.debug("⚠️ Error with selector %s: %s", selector, e)
+                        else:
+                            logger.debug("No visible, enabled element found for %s", field)
                         
                         if not field_filled:
-                            print(f"⚠️ Could not fill {field}: {value}")
-                            # Try a more generic approach for this field
+                            logger.warning("⚠️ Could not fill %s: %s", field, value)
+                            # Look for any input with name, id, or placeholder containing the field name.
+                            # One selector list per field, so the DOM is walked once for all candidates.
+                            lowered = field.lower()
+                            generic_fields[field] = [", ".join((
+                                f'[name*="{lowered}"]',
+                                f'[id*="{lowered}"]',
+                                f'[placeholder*="{lowered}"]',
+                                f'input[name*="{lowered}"]',
+                                f'input[id*="{lowered}"]'
+                            ))]
+                    
+                    # Try a more generic approach for every unfilled field, resolved together in one round-trip
+                    if generic_fields:
+                        try:
+                            resolved_generic = page.evaluate(_RESOLVE_FIELDS_JS, generic_fields)
+                        except Exception as e:
+                            logger.debug("⚠️ Generic selector approach failed: %s", e)
+                            resolved_generic = {}
+                        
+                        for field, target in resolved_generic.items():
                             try:
-                                # Look for any input with name, id, or placeholder containing the field name
-                                generic_selectors = [
-                                    f'[name*="{field.lower()}"]',
-                                    f'[id*="{field.lower()}"]',
-                                    f'[placeholder*="{field.lower()}"]',
-                                    f'input[name*="{field.lower()}"]',
-                                    f'input[id*="{field.lower()}"]'
-                                ]
-                                
-                                for generic_selector in generic_selectors:
-                                    try:
-                                        generic_element = page.query_selector(generic_selector)
-                                        if generic_element and generic_element.is_visible() and generic_element.is_enabled():
-                                            generic_element.fill(value)
-                                            print(f"✅ Filled {field} using generic selector: {generic_selector}")
-                                            field_filled = True
-                                            fields_filled += 1
-                                            break
-                                    except:
-                                        continue
-                                        
+                                page.locator(target['selector']).first.fill(_CHECKOUT_FORM_DATA[field])
+                                logger.debug("✅ Filled %s using generic selector: %s", field, target['selector'])
+                                fields_filled += 1
                             except Exception as e:
-                                print(f"   ⚠️ Generic selector approach failed: {str(e)}")
+                                logger.debug("⚠️ Generic selector approach failed for %s: %s", field, e)
                     
-                    print(f"📊 Successfully filled {fields_filled} out of {len(checkout_info)} fields")
+                    logger.info("📊 Successfully filled %s out of %s fields", fields_filled, len(_CHECKOUT_FORM_DATA))
                     
                     # Handle special cases: Payment method selection
                     try:
-                        # Try to select credit card as payment method
-                        payment_selectors = [
-                            'input[value="credit_card"]',
-                            'input[name="paymentMethod"][value="credit_card"]',
-                            '[data-testid="credit-card-option"]',
-                            'input[type="radio"][value*="credit"]'
-                        ]
-                        
-                        for selector in payment_selectors:
+                        # Try to select credit card as payment method, only visiting selectors present on the page
+                        for selector in page.evaluate(_PRESENT_SELECTORS_JS, list(_PAYMENT_SELECTORS)):
                             try:
-                                payment_element = page.query_selector(selector)
-                                if payment_element:
-                                    payment_element.check()
-                                    print("✅ Selected credit card payment method")
-                                    break
+                                page.locator(selector).first.check()
+                                logger.info("✅ Selected credit card payment method")
+                                break
                             except:
                                 continue
                     except:
-                        print("⚠️ Could not select payment method")
+                        logger.warning("⚠️ Could not select payment method")
                     
-                    # Wait for form validation
-                    time.sleep(3)
+                    # Let requests triggered by the form settle (returns at once if the network is already idle)
+                    try:
+                        page.wait_for_load_state('networkidle', timeout=3000)
+                    except Exception:
+                        pass
                     
 
                     
+                    check_deadline(page)
                     # Look for and click submit/complete order button with comprehensive selectors
-                    print(f"🔄 Looking for submit/complete order button...")
-                    
-                    submit_selectors = [
-                        # Primary submit buttons
-                        'button[type="submit"]',
-                        'input[type="submit"]',
-                        
-                        # Text-based button selectors
-                        'button:has-text("Complete Order")',
-                        'button:has-text("Place Order")',
-                        'button:has-text("Submit Order")',
-                        'button:has-text("Complete")',
-                        'button:has-text("Submit")',
-                        'button:has-text("Order")',
-                        'button:has-text("Purchase")',
-                        'button:has-text("Checkout")',
-                        'button:has-text("Buy Now")',
-                        'button:has-text("Confirm")',
-                        
-                        # Case-insensitive variations
-                        'button:has-text("COMPLETE ORDER")',
-                        'button:has-text("PLACE ORDER")',
-                        'button:has-text("SUBMIT ORDER")',
-                        
-                        # Data attributes and IDs
-                        '[data-testid="submit-order"]',
-                        '[data-testid="complete-order"]',
-                        '[data-testid="place-order"]',
-                        '[data-testid="checkout-submit"]',
-                        
-                        # Class-based selectors
-                        '.submit-btn',
-                        '.complete-order',
-                        '.place-order',
-                        '.checkout-submit',
-                        '.order-submit',
-                        
-                        # ID selectors
-                        '#submit',
-                        '#complete-order',
-                        '#place-order',
-                        '#checkout-submit',
-                        '#order-submit'
-                    ]
+                    logger.info("🔄 Looking for submit/complete order button...")
                     
                     submit_clicked = False
-                    for selector in submit_selectors:
-                        try:
-                            button = page.query_selector(selector)
-                            if button and button.is_visible() and button.is_enabled():
-                                print(f"🎯 Found submit button: {selector}")
-                                button.click()
-                                print(f"✅ Successfully clicked submit button")
-                                submit_clicked = True
-                                break
-                        except Exception as e:
-                            continue
+                    order_id = None
+                    page_content = None
+                    try:
+                        # First visible, enabled submit button, probed in the page in one round-trip
+                        resolved_submit = page.evaluate(_RESOLVE_FIELDS_JS, {'submit': list(_SUBMIT_SELECTORS)})
+                        if resolved_submit:
+                            selector = resolved_submit['submit']['selector']
+                            logger.info("🎯 Found submit button: %s", selector)
+                            page.locator(selector).first.click()
+                            logger.info("✅ Successfully clicked submit button")
+                            submit_clicked = True
+                    except Exception as e:
+                        pass
                     
                     if not submit_clicked:
-                        print("❌ Could not find submit button, trying fallback approach...")
+                        logger.warning("❌ Could not find submit button, trying fallback approach...")
                         # Fallback: look for any button that might be a submit button
                         try:
-                            all_buttons = page.query_selector_all('button, input[type="button"], input[type="submit"]')
-                            for button in all_buttons:
-                                try:
-                                    text = button.inner_text().lower() if button.inner_text() else ''
-                                    value = button.get_attribute('value') or ''
-                                    if any(phrase in text or phrase in value.lower() for phrase in ['submit', 'complete', 'order', 'place', 'confirm', 'buy']):
-                                        print(f"🔄 Trying fallback button: {text or value}")
-                                        button.click()
-                                        submit_clicked = True
-                                        break
-                                except:
-                                    continue
+                            button_selector = 'button, input[type="button"], input[type="submit"]'
+                            match = page.evaluate(_FIRST_BUTTON_WITH_TEXT_JS, [button_selector, 0, ['submit', 'complete', 'order', 'place', 'confirm', 'buy']])
+                            if match:
+                                logger.info("🔄 Trying fallback button: %s", match['text'])
+                                page.locator(button_selector).nth(match['index']).click()
+                                submit_clicked = True
                         except:
                             pass
                     
                     if submit_clicked:
-                        print("✅ Order submission initiated")
+                        logger.info("✅ Order submission initiated")
                         
+                        check_deadline(page)
                         # STEP 6: Wait for redirect to order success page
-                        print(f"⏳ Waiting for redirect to order success page...")
+                        logger.info("⏳ Waiting for redirect to order success page...")
                         
                         success_page_reached = False
                         current_url = page.url
-                        print(f"📍 Starting URL: {current_url}")
+                        logger.info("📍 Starting URL: %s", current_url)
                         
-                        # Strategy 1: Wait for navigation event (works for full page redirects)
+                        # Strategy 1: Wait for the URL to reach a success path. This covers full redirects
+                        # and client-side routing, and returns at once if the click already navigated.
                         try:
-                            print("🔄 Attempting to wait for navigation event...")
-                            page.wait_for_navigation(timeout=15000)  # 15 seconds
-                            new_url = page.url
-                            print(f"✅ Navigation detected! New URL: {new_url}")
-                            
-                            # Check if the new URL is a success page
-                            success_patterns = ['/order-success', '/success', '/confirmation', '/thank-you', '/order-complete', '/order-confirmed']
-                            if any(pattern in new_url.lower() for pattern in success_patterns):
-                                success_page_reached = True
-                                print(f"✅ Successfully redirected to order success page via navigation: {new_url}")
-                            
+                            logger.info("🔄 Waiting for the URL to reach an order success path...")
+                            page.wait_for_url(_SUCCESS_URL_RE, timeout=15000)
+                            success_page_reached = True
+                            logger.info("✅ Successfully redirected to order success page: %s", page.url)
                         except Exception as e:
-                            print(f"⚠️ No navigation event detected: {e}")
-                        
-                        # Strategy 2: Wait for URL pattern match (works for client-side routing)
-                        if not success_page_reached:
-                            print("🔄 Attempting to wait for URL pattern match...")
-                            success_patterns = ['**/order-success*', '**/success*', '**/confirmation*', '**/thank-you*']
-                            
-                            for pattern in success_patterns:
-                                try:
-                                    print(f"   Trying pattern: {pattern}")
-                                    page.wait_for_url(pattern, timeout=10000)  # 10 seconds per pattern
-                                    new_url = page.url
-                                    print(f"✅ URL pattern matched! New URL: {new_url}")
-                                    success_page_reached = True
-                                    break
-                                except Exception as e:
-                                    print(f"   Pattern {pattern} not matched: {e}")
-                                    continue
+                            logger.warning("⚠️ No redirect to a success path detected: %s", e)
                         
-                        # Strategy 3: Manual polling with DOM change detection
+                        # Strategy 2: Let the page poll its own URL and rendered text for success indicators
                         if not success_page_reached:
-                            print("🔄 Falling back to manual URL polling with DOM monitoring...")
-                            max_wait_time = 20
-                            wait_interval = 1
-                            waited_time = 0
-                            last_url = page.url
-                            
-                            while waited_time < max_wait_time and not success_page_reached:
-                                try:
-                                    current_url = page.url
-                                    
-                                    # Check if URL changed
-                                    if current_url != last_url:
-                                        print(f"🔍 URL changed from {last_url} to {current_url}")
-                                        last_url = current_url
-                                    
-                                    # Check for success page patterns
-                                    success_patterns = ['/order-success', '/success', '/confirmation', '/thank-you', '/order-complete', '/order-confirmed']
-                                    if any(pattern in current_url.lower() for pattern in success_patterns):
-                                        success_page_reached = True
-                                        print(f"✅ Success page detected via polling: {current_url}")
-                                        break
-                                    
-                                    # Also check DOM content for success indicators
-                                    try:
-                                        # Look for success-related text in the page
-                                        success_text_indicators = [
-                                            'text="Order placed successfully"',
-                                            'text="Thank you for your order"',
-                                            'text="Order confirmation"',
-                                            'text="Your order has been placed"',
-                                            ':has-text("Order #")',
-                                            ':has-text("Order Number")'
-                                        ]
-                                        
-                                        for indicator in success_text_indicators:
-                                            try:
-                                                element = page.query_selector(indicator)
-                                                if element and element.is_visible():
-                                                    print(f"✅ Success page detected via DOM content: found '{indicator}'")
-                                                    success_page_reached = True
-                                                    break
-                                            except:
-                                                continue
-                                        
-                                        if success_page_reached:
-                                            break
-                                            
-                                    except:
-                                        pass
-                                    
-                                    print(f"🔍 Current URL (polling {waited_time}s): {current_url}")
-                                    time.sleep(wait_interval)
-                                    waited_time += wait_interval
-                                    
-                                except Exception as e:
-                                    print(f"⚠️ Error during polling: {e}")
-                                    time.sleep(wait_interval)
-                                    waited_time += wait_interval
+                            logger.info("🔄 Falling back to watching the page for success indicators...")
+                            try:
+                                page.wait_for_function(
+                                    _SUCCESS_PAGE_JS,
+                                    arg=[list(_SUCCESS_URL_PARTS), list(_SUCCESS_TEXT_PHRASES)],
+                                    polling=250,
+                                    timeout=20000
+                                )
+                                success_page_reached = True
+                                logger.info("✅ Success page detected in the page: %s", page.url)
+                            except Exception as e:
+                                logger.warning("⚠️ No success indicators within 20s: %s", e)
                         
                         if not success_page_reached:
-                            print(f"⚠️ Could not detect order success page after all strategies")
-                            print(f"📍 Final URL: {page.url}")
+                            logger.warning("⚠️ Could not detect order success page after all strategies")
+                            logger.info("📍 Final URL: %s", page.url)
                             
                             # Still try to extract order info from current page in case it's there
-                            print("🔄 Attempting order extraction from current page anyway...")
+                            logger.info("🔄 Attempting order extraction from current page anyway...")
                         else:
-                            print(f"✅ Order success page reached: {page.url}")
+                            logger.info("✅ Order success page reached: %s", page.url)
                         
+                        check_deadline(page)
                         # STEP 7: Extract order number from success page
-                        print(f"🔍 Extracting order number from success page...")
+                        logger.info("🔍 Extracting order number from success page...")
                         
-                        # Wait for success page to fully load
-                        time.sleep(3)
+                        # Wait for an order number marker to render, up to 3 seconds
+                        try:
+                            page.wait_for_selector(_ORDER_MARKER_SELECTOR, timeout=3000)
+                        except Exception:
+                            pass
                         
                         order_id = None
                         order_info = {}
+                        # One completion time for whichever extraction strategy wins
+                        completed_at = time.strftime('%Y-%m-%d %H:%M:%S')
                         
-                        # Comprehensive order number extraction strategies
-                        order_extraction_strategies = [
-                            # Strategy 1: Look for "Order #" or "Order Number" text patterns
-                            {
-                                'name': 'Order # Text Pattern',
-                                'selectors': [
-                                    'span:has-text("Order #")',
-                                    'div:has-text("Order #")',
-                                    'p:has-text("Order #")',
-                                    'span:has-text("Order Number")',
-                                    'div:has-text("Order Number")',
-                                    'p:has-text("Order Number")',
-                                    'h1:has-text("Order")',
-                                    'h2:has-text("Order")',
-                                    'h3:has-text("Order")'
-                                ],
-                                'regex': r'Order\s*#\s*([A-Z0-9][A-Za-z0-9-]{5,})'
-                            },
-                            
-                            # Strategy 2: Look for data attributes and IDs
-                            {
-                                'name': 'Data Attributes',
-                                'selectors': [
-                                    '[data-testid*="order"]',
-                                    '[data-testid*="orderNumber"]',
-                                    '[data-testid*="order-id"]',
-                                    '[id*="order-number"]',
-                                    '[id*="orderNumber"]',
-                                    '[id*="order-id"]',
-                                    '[class*="order-number"]',
-                                    '[class*="orderNumber"]',
-                                    '[class*="order-id"]'
-                                ],
-                                'regex': r'([A-Za-z0-9-]+)'
-                            },
-                            
-                            # Strategy 3: Look for confirmation/success specific elements
-                            {
-                                'name': 'Confirmation Elements',
-                                'selectors': [
-                                    '.confirmation .order-number',
-                                    '.success .order-number',
-                                    '.order-confirmation',
-                                    '.order-summary',
-                                    '.thank-you .order-number'
-                                ],
-                                'regex': r'([A-Za-z0-9-]+)'
-                            }
-                        ]
+                        # Read the text of every strategy's candidate elements in one round-trip
+                        try:
+                            candidate_texts = page.evaluate(_VISIBLE_TEXTS_JS, _ORDER_EXTRACTION_SELECTORS)
+                        except Exception as e:
+                            logger.warning("Error reading order number candidates: %s", e)
+                            candidate_texts = {}
                         
                         # Try each extraction strategy
-                        for strategy in order_extraction_strategies:
+                        for strategy in _ORDER_EXTRACTION_STRATEGIES:
                             if order_id:
                                 break
                                 
-                            print(f"🎯 Trying strategy: {strategy['name']}")
+                            logger.debug("Trying order extraction strategy: %s", strategy['name'])
                             
                             for selector in strategy['selectors']:
-                                try:
-                                    element = page.query_selector(selector)
-                                    if element and element.is_visible():
-                                        text = element.inner_text().strip()
-                                        print(f"🔍 Found element with text: {text}")
-                                        
-                                        # Extract order ID using strategy's regex
-                                        order_match = re.search(strategy['regex'], text, re.IGNORECASE)
-                                        if order_match:
-                                            order_id = order_match.group(1)
-                                            print(f"✅ Extracted order ID: {order_id} (using {strategy['name']})")
-                                            
-                                            # Store additional order info
-                                            order_info = {
-                                                'order_id': order_id,
-                                                'extraction_method': strategy['name'],
-                                                'selector_used': selector,
-                                                'full_text': text,
-                                                'success_page_url': page.url,
-                                                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
-                                            }
-                                            break
-                                except Exception as e:
+                                text = candidate_texts.get(selector)
+                                if text is None:
                                     continue
+                                logger.debug("Order candidate %s has text: %s", selector, text)
+                                
+                                # Extract order ID using strategy's regex
+                                order_match = strategy['regex'].search(text)
+                                if order_match:
+                                    order_id = order_match.group(1)
+                                    logger.info("✅ Extracted order ID: %s (using %s)", order_id, strategy['name'])
+                                    
+                                    # Store additional order info
+                                    order_info = {
+                                        'order_id': order_id,
+                                        'extraction_method': strategy['name'],
+                                        'selector_used': selector,
+                                        'full_text': text,
+                                        'success_page_url': page.url,
+                                        'timestamp': completed_at
+                                    }
+                                    break
                         
                         # Fallback: Extract from URL if still not found
                         if not order_id:
-                            print("🔄 Trying URL extraction as fallback...")
+                            logger.debug("Trying URL extraction as fallback")
                             try:
                                 current_url = page.url
-                                url_patterns = [
-                                    r'order-success/([A-Za-z0-9-]+)',
-                                    r'order/([A-Za-z0-9-]+)',
-                                    r'success/([A-Za-z0-9-]+)',
-                                    r'confirmation/([A-Za-z0-9-]+)',
-                                    r'[?&]order[=:]([A-Za-z0-9-]+)',
-                                    r'[?&]id[=:]([A-Za-z0-9-]+)',
-                                    r'[?&]order_id[=:]([A-Za-z0-9-]+)'
-                                ]
-                                
-                                for pattern in url_patterns:
-                                    url_match = re.search(pattern, current_url, re.IGNORECASE)
-                                    if url_match:
-                                        order_id = url_match.group(1)
-                                        order_info = {
-                                            'order_id': order_id,
-                                            'extraction_method': 'URL Pattern',
-                                            'pattern_used': pattern,
-                                            'success_page_url': current_url,
-                                            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
-                                        }
-                                        print(f"✅ Extracted order ID from URL: {order_id}")
-                                        break
+                                url_match = _best_ranked_match(_ORDER_URL_UNION, current_url)
+                                if url_match:
+                                    rank, order_id = url_match
+                                    order_info = {
+                                        'order_id': order_id,
+                                        'extraction_method': 'URL Pattern',
+                                        'pattern_used': _ORDER_URL_PATTERNS[rank].pattern,
+                                        'success_page_url': current_url,
+                                        'timestamp': completed_at
+                                    }
+                                    logger.info("✅ Extracted order ID from URL: %s", order_id)
                             except Exception as e:
-                                print(f"⚠️ URL extraction error: {e}")
+                                logger.warning("URL extraction error: %s", e)
                         
                         # Final fallback: Get any text that looks like an order ID
+                        # (the serialized page is kept for the debug dump below)
                         if not order_id:
-                            print("🔄 Final fallback: scanning entire page content...")
+                            logger.debug("Final fallback: scanning entire page content")
                             try:
                                 page_content = page.content()
-                                # Look for patterns like "ORD-20251013090947-B12E70F6", "12345", etc.
-                                fallback_patterns = [
-                                    r'Order\s*#\s*([A-Z0-9][A-Za-z0-9-]{5,})',
-                                    r'\b(ORD-[A-Z0-9-]+)\b',
-                                    r'\b([A-Z]{3}-[0-9]{14}-[A-Z0-9]{8})\b',
-                                    r'order[#\s:]*([A-Z0-9-]{6,})',
-                                    r'confirmation[#\s:]*([A-Z0-9-]{6,})',
-                                    r'\b([A-Z]{2,}[0-9]{4,})\b',
-                                    r'\b([0-9]{6,})\b'
-                                ]
-                                
-                                for pattern in fallback_patterns:
-                                    matches = re.findall(pattern, page_content, re.IGNORECASE)
-                                    if matches:
-                                        order_id = matches[0]
-                                        order_info = {
-                                            'order_id': order_id,
-                                            'extraction_method': 'Page Content Scan',
-                                            'pattern_used': pattern,
-                                            'success_page_url': page.url,
-                                            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
-                                        }
-                                        print(f"✅ Extracted order ID from page content: {order_id}")
-                                        break
+                                found = _find_order_id_in_content(page_content)
+                                if found:
+                                    order_id, pattern_used = found
+                                    order_info = {
+                                        'order_id': order_id,
+                                        'extraction_method': 'Page Content Scan',
+                                        'pattern_used': pattern_used,
+                                        'success_page_url': page.url,
+                                        'timestamp': completed_at
+                                    }
+                                    logger.info("✅ Extracted order ID from page content: %s", order_id)
                             except Exception as e:
-                                print(f"⚠️ Page content scan error: {e}")
+                                logger.warning("Page content scan error: %s", e)
                         
                     else:
-                        print("❌ Could not submit order - no submit button found")
+                        logger.warning("❌ Could not submit order - no submit button found")
                         order_info = {
                             'error': 'Could not submit order - no submit button found',
                             'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
                         }
                     
                     # Log comprehensive results
-                    print("\n" + "="*60)
-                    print("🛒 CHECKOUT COMPLETION RESULTS")
-                    print("="*60)
+                    logger.info("🛒 CHECKOUT COMPLETION RESULTS")
                     
                     if order_id:
-                        print(f"✅ ORDER SUCCESSFULLY PLACED!")
-                        print(f"📋 Order ID: {order_id}")
-                        print(f"🔍 Extraction Method: {order_info.get('extraction_method', 'Unknown')}")
-                        print(f"🌐 Success Page URL: {order_info.get('success_page_url', page.url)}")
-                        print(f"🕒 Completed At: {order_info.get('timestamp', 'Unknown')}")
+                        logger.info("✅ ORDER SUCCESSFULLY PLACED!")
+                        logger.info("📋 Order ID: %s", order_id)
+                        logger.info("🔍 Extraction Method: %s", order_info.get('extraction_method', 'Unknown'))
+                        logger.info("🌐 Success Page URL: %s", order_info.get('success_page_url', page.url))
+                        logger.info("🕒 Completed At: %s", order_info.get('timestamp', 'Unknown'))
                         
                         if order_info.get('full_text'):
-                            print(f"📝 Full Text Found: {order_info['full_text']}")
-                        
-                        # Store order info globally for UI display
-                        global _order_completion_results
-                        _order_completion_results = order_info
+                            logger.info("📝 Full Text Found: %s", order_info['full_text'])
                         
                     else:
-                        print("❌ Order ID: Not found")
-                        print("🔍 Attempted all extraction strategies without success")
+                        logger.warning("❌ Order ID: Not found")
+                        logger.info("🔍 Attempted all extraction strategies without success")
                         
-                        # Try to get page content for debugging
-                        try:
-                            print("📄 Success page content (first 1000 chars):")
-                            page_content = page.content()
-                            print(page_content[:1000] + "..." if len(page_content) > 1000 else page_content)
-                        except Exception as e:
-                            print(f"⚠️ Could not retrieve page content: {e}")
+                        # Dump the head of the page for debugging; skipped entirely unless DEBUG is on
+                        if logger.isEnabledFor(logging.DEBUG):
+                            try:
+                                if page_content is None:
+                                    # Only the head of the document is logged, so don't serialize all of it
+                                    page_content = page.evaluate("() => document.documentElement.outerHTML.slice(0, 1001)")
+                                logger.debug("Success page content (first 1000 chars):\n%s%s", page_content[:1000], "..." if len(page_content) > 1000 else "")
+                            except Exception as e:
+                                logger.debug("Could not retrieve page content: %s", e)
                         
-                        # Store error info
-                        _order_completion_results = {
+                        # Report error info
+                        order_info = {
                             'error': 'Order ID not found after successful form submission',
                             'final_url': page.url,
                             'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
                         }
                     
-                    print("="*60)
-                    
-                    # Wait before closing to allow user to see results
-                    print("⏳ Closing browser in 3 seconds...")
-                    time.sleep(3)
+                    # Wait before closing to allow user to see results; TAP_KEEP_BROWSER_OPEN=1
+                    if os.getenv('TAP_KEEP_BROWSER_OPEN'):
+                        logger.info("⏳ Closing browser window in 3 seconds...")
+                        page.wait_for_timeout(3000)
                     
                     return order_id is not None, order_info
                     
                 except Exception as e:
-                    print(f"❌ Checkout error: {e}")
-                
-                # Close the browser
-                try:
-                    print("🔒 Closing browser...")
-                    browser.close()
-                except Exception as e:
-                    print(f"Error closing browser: {e}")
-        
-        # Start checkout in a separate thread
-        checkout_thread = threading.Thread(target=run_full_checkout, daemon=True)
-        checkout_thread.start()
+                    logger.error("❌ Checkout error: %s", e)
+                    return False, {'error': f'Checkout error: {str(e)}', 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')}
         
-        # Wait for the thread to complete (with timeout)
-        checkout_thread.join(timeout=120)  # 2 minute timeout
+        # Run checkout on the shared browser thread
+        checkout = run_in_browser(run_full_checkout)
         
-        # Check if thread is still alive (timed out)
-        if checkout_thread.is_alive():
-            print("⚠️ Checkout process timed out after 2 minutes")
+        # Wait for the checkout result (with timeout)
+        try:
+            return checkout.result(timeout=_CHECKOUT_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            # Drops the job if it never started; a running one stops at its next deadline check
+            checkout.cancel()
+            logger.warning("⚠️ Checkout process timed out after 2 minutes")
             return False, {'error': 'Checkout process timed out after 2 minutes', 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')}
-        
-        # Return results
-        if _order_completion_results:
-            if 'error' in _order_completion_results:
-                return False, _order_completion_results
-            else:
-                return True, _order_completion_results
-        else:
-            return False, {'error': 'Checkout process completed but no results found', 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')}
+        except Exception as e:
+            # The browser worker couldn't start Playwright, launch Chromium or open a context
+            logger.error("❌ Checkout could not run: %s", e)
+            return False, {'error': f'Checkout process failed to start: {str(e)}', 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')}
             
     except ImportError:
         return False, {'error': 'Playwright not installed', 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')}
@@ -1230,7 +1489,7 @@ def complete_checkout_with_playwright(product_url: str, cart_url: str, checkout_
         return False, {'error': f'Checkout error: {str(e)}', 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')}
 
 def create_signature(private_key_pem: str, json_data: str) -> str:
-    """Create a signature using the private key with JSON data and base64 encoding"""
+    """Sign the canonical (compact, key-sorted) JSON with the private key and return the base64 signature"""
     try:
         # Parse JSON to validate it
         try:
@@ -1242,20 +1501,14 @@ def create_signature(private_key_pem: str, json_data: str) -> str:
         # Convert JSON to string (compact format)
         json_string = json.dumps(parsed_json, separators=(',', ':'), sort_keys=True)
         
-        # Base64 encode the JSON string
-        base64_data = base64.b64encode(json_string.encode('utf-8')).decode('utf-8')
-        print(f"Base64 Encoded Data: {base64_data}")    
+        logger.debug("Canonical JSON to sign: %s", json_string)
         
         # Load private key
-        private_key = serialization.load_pem_private_key(
-            private_key_pem.encode('utf-8'),
-            password=None,
-            backend=default_backend()
-        )
+        private_key = _load_private_key(private_key_pem)
         
-        # Sign the base64 encoded data
+        # Sign the canonical JSON bytes directly
         signature = private_key.sign(
-            base64_data.encode('utf-8'),
+            json_string.encode('utf-8'),
             padding.PSS(
                 mgf=padding.MGF1(hashes.SHA256()),
                 salt_length=padding.PSS.MAX_LENGTH
@@ -1263,7 +1516,7 @@ def create_signature(private_key_pem: str, json_data: str) -> str:
             hashes.SHA256()
         )
         
-        return base64.b64encode(signature).decode('utf-8')
+        return b64encode_str(signature)
     except Exception as e:
         st.error(f"Error creating signature: {str(e)}")
         return ""
@@ -1275,28 +1528,21 @@ def create_http_message_signature(private_key_pem: str, authority: str, path: st
         signature_params = f'("@authority" "@path"); created={created}; expires={expires}; keyId="{keyid}"; alg="rsa-pss-sha256"; nonce="{nonce}"; tag="{tag}"'
         
         # Create the signature base string following RFC 9421 format
-        signature_base_lines = [
-            f'"@authority": {authority}',
-            f'"@path": {path}',
-            f'"@signature-params": {signature_params}'
-        ]
-        signature_base = '\n'.join(signature_base_lines)
+        signature_base = b'\n'.join((
+            b'"@authority": ' + authority.encode('utf-8'),
+            b'"@path": ' + path.encode('utf-8'),
+            b'"@signature-params": ' + signature_params.encode('utf-8')
+        ))
         
-        print(f"Signature Base String:\n{signature_base}")
-        print(f"Authority: {authority}")
-        print(f"Path: {path}")
-        print(f"Signature Params: {signature_params}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Signature base for %s%s:\n%s", authority, path, signature_base.decode('utf-8'))
         
         # Load private key
-        private_key = serialization.load_pem_private_key(
-            private_key_pem.encode('utf-8'),
-            password=None,
-            backend=default_backend()
-        )
+        private_key = _load_private_key(private_key_pem)
         
         # Sign the signature base string using RSA-PSS (matching the algorithm declared)
         signature = private_key.sign(
-            signature_base.encode('utf-8'),
+            signature_base,
             padding.PSS(
                 mgf=padding.MGF1(hashes.SHA256()),
                 salt_length=padding.PSS.MAX_LENGTH
@@ -1304,10 +1550,10 @@ def create_http_message_signature(private_key_pem: str, authority: str, path: st
             hashes.SHA256()
         )
         
-        signature_b64 = base64.b64encode(signature).decode('utf-8')
+        signature_b64 = b64encode_str(signature)
         
         # Format the signature-input header (RFC 9421 format)
-        signature_input_header = f'sig2=("@authority" "@path"); created={created}; expires={expires}; keyId="{keyid}"; alg="rsa-pss-sha256"; nonce="{nonce}"; tag="{tag}"'
+        signature_input_header = f'sig2={signature_params}'
         
         # Format the signature header (RFC 9421 format)
         signature_header = f'sig2=:{signature_b64}:'
@@ -1321,79 +1567,140 @@ def create_http_message_signature(private_key_pem: str, authority: str, path: st
 def create_ed25519_signature(private_key_pem: str, authority: str, path: str, keyid: str, nonce: str, created: int, expires: int, tag: str) -> tuple[str, str]:
     """Create HTTP Message Signature using Ed25519 following RFC 9421"""
     try:
-        from cryptography.hazmat.primitives.asymmetric import ed25519
-        
-        print(f"🔐 Creating Ed25519 signature...")
-        print(f"🌐 Authority: {authority}")
-        print(f"📍 Path: {path}")
-        
         # Create signature parameters string
         signature_params = f'("@authority" "@path"); created={created}; expires={expires}; keyId="{keyid}"; alg="ed25519"; nonce="{nonce}"; tag="{tag}"'
         
         # Create the signature base string
-        signature_base_lines = [
-            f'"@authority": {authority}',
-            f'"@path": {path}',
-            f'"@signature-params": {signature_params}'
-        ]
-        signature_base = '\n'.join(signature_base_lines)
+        signature_base = b'\n'.join((
+            b'"@authority": ' + authority.encode('utf-8'),
+            b'"@path": ' + path.encode('utf-8'),
+            b'"@signature-params": ' + signature_params.encode('utf-8')
+        ))
         
-        print(f"🔐 Ed25519 Signature Base String:\n{signature_base}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Ed25519 signature base for %s%s:\n%s", authority, path, signature_base.decode('utf-8'))
         
         # Load Ed25519 keys from environment variables
         try:
             ed25519_private_b64, ed25519_public_b64 = get_ed25519_keys_from_env()
-            print(f"🔑 Using Ed25519 keys from environment variables")
         except ValueError as e:
-            print(f"❌ Ed25519 keys not found in environment: {e}")
+            logger.error(f"Ed25519 keys not found in environment: {e}")
             st.error(f"Ed25519 keys not configured. Please add ED25519_PRIVATE_KEY and ED25519_PUBLIC_KEY to your .env file.")
             return "", ""
         
         # Load private key from base64
-        private_bytes = base64.b64decode(ed25519_private_b64)
-        private_key = ed25519.Ed25519PrivateKey.from_private_bytes(private_bytes)
-        
-        print(f"🔑 Using Ed25519 Private Key: {ed25519_private_b64[:20]}...")
-        print(f"🔑 Using Ed25519 Public Key: {ed25519_public_b64[:20]}...")
+        private_key = _load_ed25519_private_key(ed25519_private_b64)
         
         # Sign with Ed25519 (no padding needed)
-        signature = private_key.sign(signature_base.encode('utf-8'))
-        signature_b64 = base64.b64encode(signature).decode('utf-8')
+        signature = private_key.sign(signature_base)
+        signature_b64 = b64encode_str(signature)
         
         # Format headers
-        signature_input_header = f'sig2=("@authority" "@path"); created={created}; expires={expires}; keyId="{keyid}"; alg="ed25519"; nonce="{nonce}"; tag="{tag}"'
+        signature_input_header = f'sig2={signature_params}'
         signature_header = f'sig2=:{signature_b64}:'
         
-        print(f"✅ Created Ed25519 signature")
-        print(f"📤 Signature-Input: {signature_input_header}")
-        print(f"🔒 Signature: {signature_header}")
+        logger.debug("Created Ed25519 signature: Signature-Input=%s Signature=%s", signature_input_header, signature_header)
         
         return signature_input_header, signature_header
         
     except Exception as e:
-        print(f"❌ Error creating Ed25519 signature: {str(e)}")
+        logger.error(f"Error creating Ed25519 signature: {str(e)}")
         st.error(f"Error creating Ed25519 signature: {str(e)}")
         return "", ""
 
 def parse_url_components(url: str) -> tuple[str, str]:
     """Parse URL to extract authority and path components"""
     try:
-        from urllib.parse import urlparse
-        parsed = urlparse(url)
-        
-        # Authority is the host (and port if not default)
-        authority = parsed.netloc
-        
-        # Path includes the path and query parameters
-        path = parsed.path
-        if parsed.query:
-            path += f"?{parsed.query}"
+        authority, path = _split_url(url)
         
         return authority, path
     except Exception as e:
         st.error(f"Error parsing URL: {str(e)}")
         return "", ""
 
+def _clear_product_details():
+    """Drop the extracted product details ahead of the fragment rerun the clear button triggers"""
+    st.session_state.product_details = None
+
+def _render_checkout_outcome(success: bool, order_info: Optional[dict]):
+    """Show the checkout result: order confirmation, placed without an order ID, or failure"""
+    if not (success and order_info):
+        st.error("❌ Checkout failed.")
+        error = order_info.get('error') if order_info else None
+        if error is None:
+            st.error("Checkout process failed to complete successfully.")
+            return
+        st.error(f"Error: {error}")
+        with st.expander("Error Details"):
+            st.json(order_info)
+        return
+    
+    st.success("🎉 Checkout completed successfully!")
+    
+    if not order_info.get('order_id'):
+        st.warning("Order was placed but order ID could not be extracted.")
+        with st.expander("Debug Information"):
+            st.json(order_info)
+        return
+    
+    st.markdown("### 📋 Order Confirmation")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Order ID", order_info['order_id'])
+    
+    with col2:
+        # One markdown element for the order fields
+        st.markdown(
+            f"**Completed At:** {order_info.get('timestamp', 'Unknown')}  \n"
+            f"**Extraction Method:** {order_info.get('extraction_method', 'Unknown')}"
+        )
+        success_page_url = order_info.get('success_page_url')
+        st.link_button("View Success Page", success_page_url or "#", disabled=not success_page_url)
+    
+    # Show full order details in expander
+    with st.expander("🔍 Full Order Details"):
+        st.json(order_info)
+
+@st.fragment
+def _render_product_details():
+    """Product Details section; as a fragment, its clear button reruns only this section"""
+    product_details = st.session_state.product_details
+    if not product_details:
+        return
+    
+    st.header("📦 Product Details")
+    
+    # Clear button; the callback runs before the click's fragment rerun, so no second rerun is needed
+    st.button("🗑️ Clear Product Details", on_click=_clear_product_details)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if product_details.title:
+            st.subheader("📦 Product Title")
+            st.write(product_details.title)
+        else:
+            st.subheader("📦 Product Title")
+            st.write("❌ Not found")
+    
+    with col2:
+        if product_details.price:
+            st.subheader("💰 Product Price")
+            st.write(product_details.price)
+        else:
+            st.subheader("💰 Product Price")
+            st.write("❌ Not found")
+    
+    # Additional extraction details
+    with st.expander("🔍 Extraction Details"):
+        extraction_time = product_details.extraction_time
+        st.write(f"**Extraction Time:** {extraction_time}")
+        st.write(f"**URL:** {product_details.url}")
+        if product_details.extraction_log:
+            st.caption("Extraction Log")
+            st.code(product_details.extraction_log, language=None)
+
 def main():
     st.set_page_config(
         page_title="TAP Agent",
@@ -1456,12 +1763,6 @@ def main():
         }
         st.session_state.input_data = json.dumps(default_input, indent=2)
     
-    # Load static keys if not already loaded
-    if not st.session_state.private_key or not st.session_state.public_key:
-        private_key, public_key = get_static_keys()
-        st.session_state.private_key = private_key
-        st.session_state.public_key = public_key
-    
     # Load Ed25519 keys if not already loaded
     if not st.session_state.ed25519_private_key or not st.session_state.ed25519_public_key:
         try:
@@ -1477,11 +1778,22 @@ def main():
     signature_algorithm = st.radio(
         "Select signature algorithm:",
         options=["ed25519", "rsa-pss-sha256"],
-        index=0,  # Default to ed25519
+        # Default to ed25519 when its keys are configured, otherwise fall back to RSA
+        index=0 if st.session_state.ed25519_private_key else 1,
         help="Choose the cryptographic algorithm for signature creation. Ed25519 is faster and more secure.",
         horizontal=True
     )
     
+    # RSA keys are only needed, and only loaded, once RSA signing is selected
+    if signature_algorithm == "rsa-pss-sha256" and (not st.session_state.private_key or not st.session_state.public_key):
+        try:
+            private_key, public_key = get_static_keys()
+            st.session_state.private_key = private_key
+            st.session_state.public_key = public_key
+        except ValueError:
+            # RSA keys not configured - the launch section warns about it
+            pass
+    
     # Show algorithm info
     if signature_algorithm == "ed25519":
         st.info("🚀 **Ed25519** - Fast, secure, and modern signature algorithm. Uses keys from environment variables.")
@@ -1629,7 +1941,7 @@ def main():
     
     # Single launch button that adapts to the selected action
     if st.button(button_text, type="primary", disabled=launch_disabled, help=button_help):
-        if st.session_state.private_key:
+        if not launch_disabled:
             import time
             spinner_text = f"Creating RFC 9421 signature and {'fetching product details' if action_choice == 'Product Details' else 'completing checkout'}..."
             
@@ -1649,9 +1961,8 @@ def main():
                     expires = created + 8 * 60
                     tag = tag_value
                 # Parse URL components for RFC 9421
-                print(f"🔍 Attempting to parse URL: '{reference_url}'")
                 authority, path = parse_url_components(reference_url)
-                print(f"🔍 Parse result - Authority: '{authority}', Path: '{path}'")
+                logger.debug("Parsed reference URL %r -> authority=%r path=%r", reference_url, authority, path)
                 
                 if authority and path:
                         # Create RFC 9421 compliant signature using selected algorithm
@@ -1678,9 +1989,7 @@ def main():
                                 tag=tag
                             )
 
-                        print(f"Signature Algorithm: {signature_algorithm}")
-                        print(f"Signature input String:\n{signature_input_header}")
-                        print(f"Signature String:\n{signature_header}")
+                        logger.debug("Signed with %s: Signature-Input=%s Signature=%s", signature_algorithm, signature_input_header, signature_header)
 
                         if signature_input_header and signature_header:
                             # Create headers for the request
@@ -1695,25 +2004,15 @@ def main():
                                     st.success("✅ Product extraction started!")
                                     st.info("🔄 Please wait a few seconds for extraction to complete, then check the Product Details section below.")
                                     
-                                    # Start checking for results
-                                    import time
+                                    # Wait for the browser thread to hand back results
                                     max_wait_time = 10  # seconds
-                                    check_interval = 1  # second
-                                    waited = 0
-                                    
-                                    while waited < max_wait_time:
-                                        time.sleep(check_interval)
-                                        waited += check_interval
-                                        
-                                        global _product_extraction_results
-                                        if _product_extraction_results:
-                                            st.session_state.product_details = _product_extraction_results
-                                            st.rerun()
-                                            break
-                                    
-                                    # If we get here, extraction didn't complete in time
-                                    if not _product_extraction_results:
+                                    try:
+                                        st.session_state.product_details = _product_queue.get(timeout=max_wait_time)
+                                    except queue.Empty:
+                                        # Extraction didn't complete in time
                                         st.warning("⏳ Product extraction is taking longer than expected. Check the console for updates.")
+                                    else:
+                                        st.rerun()
                                 else:
                                     st.error("❌ Failed to launch browser for product extraction")
                             else:  # Checkout
@@ -1721,9 +2020,8 @@ def main():
                                 product_url = reference_url  # Use the same reference URL for the product
                                 
                                 # Construct cart and checkout URLs based on merchant URL
-                                from urllib.parse import urlparse
-                                parsed = urlparse(reference_url)
-                                base_url = f"{parsed.scheme}://{parsed.netloc}"
+                                # authority was already parsed from reference_url when signing
+                                base_url = f"{urlparse(reference_url).scheme}://{authority}"
                                 cart_url = f"{base_url}/cart"
                                 checkout_url = f"{base_url}/checkout"
                                 
@@ -1735,38 +2033,7 @@ def main():
                                 checkout_result = complete_checkout_with_playwright(product_url, cart_url, checkout_url, headers)
                                 success, order_info = checkout_result
                                 
-                                if success and order_info:
-                                    st.success("🎉 Checkout completed successfully!")
-                                    
-                                    if order_info.get('order_id'):
-                                        st.markdown("### 📋 Order Confirmation")
-                                        
-                                        col1, col2 = st.columns(2)
-                                        with col1:
-                                            st.metric("Order ID", order_info['order_id'])
-                                            st.write(f"**Completed At:** {order_info.get('timestamp', 'Unknown')}")
-                                        
-                                        with col2:
-                                            st.write(f"**Extraction Method:** {order_info.get('extraction_method', 'Unknown')}")
-                                        st.write(f"**Success Page:** [View]({order_info.get('success_page_url', '#')})")
-                                    
-                                        # Show full order details in expander
-                                        with st.expander("🔍 Full Order Details"):
-                                            st.json(order_info)
-                                    
-                                    else:
-                                        st.warning("Order was placed but order ID could not be extracted.")
-                                        if order_info:
-                                            with st.expander("Debug Information"):
-                                                st.json(order_info)
-                                else:
-                                    st.error("❌ Checkout failed.")
-                                    if order_info and 'error' in order_info:
-                                        st.error(f"Error: {order_info['error']}")
-                                        with st.expander("Error Details"):
-                                            st.json(order_info)
-                                    elif not success:
-                                        st.error("Checkout process failed to complete successfully.")
+                                _render_checkout_outcome(success, order_info)
                         else:
                             st.error("❌ Failed to create RFC 9421 signature")
                 else:
@@ -1774,39 +2041,9 @@ def main():
     
     
     # Product Details Section
-    if st.session_state.product_details:
-        st.header("📦 Product Details")
-        
-        # Clear button
-        if st.button("🗑️ Clear Product Details"):
-            st.session_state.product_details = None
-            st.rerun()
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            if st.session_state.product_details.get('title'):
-                st.subheader("📦 Product Title")
-                st.write(st.session_state.product_details['title'])
-            else:
-                st.subheader("📦 Product Title")
-                st.write("❌ Not found")
-        
-        with col2:
-            if st.session_state.product_details.get('price'):
-                st.subheader("💰 Product Price")
-                st.write(st.session_state.product_details['price'])
-            else:
-                st.subheader("💰 Product Price")
-                st.write("❌ Not found")
-        
-        # Additional extraction details
-        with st.expander("🔍 Extraction Details"):
-            extraction_time = st.session_state.product_details.get('extraction_time', 'Unknown')
-            st.write(f"**Extraction Time:** {extraction_time}")
-            st.write(f"**URL:** {st.session_state.product_details.get('url', 'Unknown')}")
-            if st.session_state.product_details.get('extraction_log'):
-                st.text_area("Extraction Log", value=st.session_state.product_details['extraction_log'], height=150)
+    _render_product_details()
 
 if __name__ == "__main__":
+    # Give the agent's log records a handler when run as the app, not when imported
+    logging.basicConfig(format='%(asctime)s %(levelname)s %(name)s: %(message)s')
     main()